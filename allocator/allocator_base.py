@@ -1,20 +1,51 @@
 import random
+import time
 from datetime import datetime, timedelta
 import re  # Import regular expressions
 from allocator.utils import get_datetime, get_pitch_type, get_duration, format_age_group
+from allocator.feasibility import analyse_feasibility, log_feasibility
 from allocator.logger import setup_logger
+from allocator.metrics import ALLOCATION_PHASE_LATENCY, ALLOCATION_TEAMS
+from allocator.schedule import ScheduleState
+from allocator.local_search import LocalSearch
+from allocator.history import pitch_label
+from allocator.eligibility import EligibilityIndex, ORDERINGS, RANDOM_ORDER, MOST_CONSTRAINED_ORDER
 
 logger = setup_logger(__name__)
 
+# How far (in minutes) a team may be moved from its preferred kick-off if that exact slot is taken
+DEFAULT_PREFERRED_TOLERANCE_MINUTES = 30
+
+class AllocationCancelled(Exception):
+    """Raised when an allocation run is cancelled part way through."""
+
+class AllocationTimedOut(AllocationCancelled):
+    """Raised when an allocation run passes its deadline; the schedule so far is left in place."""
+
 class Allocator:
-    def __init__(self, pitches, teams, config, start_time=None, end_time=None):
-        self.pitches = pitches
+    def __init__(self, pitches, teams, config, start_time=None, end_time=None, cancel_event=None, seed=None, state=None,
+                 previous_allocations=None, deadline=None):
+        # The caller's lists and the (immutable) pitch and team definitions are never
+        # modified, so one parsed config can back many concurrent allocations
+        self.pitches = sorted(pitches, key=lambda p: (p.capacity, p.cost))
         self.teams = teams
         self.config = config
+        self.cancel_event = cancel_event
+        # time.perf_counter() value after which the run stops with AllocationTimedOut
+        self.deadline = deadline
+        # A seeded generator makes runs reproducible for the same inputs
+        self.random = random.Random(seed)
         
         reference_date = datetime.today().date()
         self.start_time = get_datetime(start_time, config.get('start_time', "10:00"), reference_date)
         self.end_time = get_datetime(end_time, config.get('end_time', "14:00"), reference_date)
+        self.preferred_tolerance = timedelta(minutes=int(config.get('preferred_time_tolerance', DEFAULT_PREFERRED_TOLERANCE_MINUTES)))
+        # Milliseconds to spend improving the greedy schedule afterwards; 0 skips it
+        self.local_search_ms = int(config.get('local_search_ms') or 0)
+        # Random (the default) or most constrained teams first
+        self.ordering = config.get('ordering') or RANDOM_ORDER
+        if self.ordering not in ORDERINGS:
+            raise ValueError(f"Unknown team ordering '{self.ordering}'. Expected one of: {', '.join(ORDERINGS)}.")
 
         self.pitch_name_map = self.create_pitch_name_map()
         self.pitch_id_map = { pitch.id: pitch for pitch in self.pitches }
@@ -22,9 +53,32 @@ class Allocator:
         # Create separate lists for free and paid pitches
         self.free_pitches = sorted([p for p in self.pitches if p.cost == 0], key=lambda p: p.capacity)
         self.paid_pitches = sorted([p for p in self.pitches if p.cost > 0], key=lambda p: (p.cost, p.capacity))
+        self.eligibility = EligibilityIndex(self.pitches, self.start_time, self.end_time)
 
-        self.allocations = []
-        self.unallocated_teams = []
+        # Occupancy lives in the state rather than on the pitches, so it can be forked
+        self.state = state if state is not None else ScheduleState()
+        self.feasibility = {}
+        self.preferred_times = {}
+        self.improvement = None
+        # Records of an earlier allocation (see allocator.history) to replay before searching
+        self.previous_allocations = previous_allocations or []
+        self.replayed_teams = []
+
+    @property
+    def allocations(self):
+        return self.state.allocations
+
+    @allocations.setter
+    def allocations(self, allocations):
+        self.state.allocations = allocations
+
+    @property
+    def unallocated_teams(self):
+        return self.state.unallocated_teams
+
+    @unallocated_teams.setter
+    def unallocated_teams(self, teams):
+        self.state.unallocated_teams = teams
 
     def create_pitch_name_map(self):
         return {pitch.format_label(): pitch for pitch in self.pitches}
@@ -32,40 +86,117 @@ class Allocator:
     def allocate(self):
         logger.info("Starting allocation process.")
         self.reset_allocation_state()  # Reset previous allocations
+        home_teams = self.config['home_teams']
+        if self.previous_allocations:
+            with ALLOCATION_PHASE_LATENCY.time(phase='warm_start'):
+                home_teams = self.replay_previous_allocations(home_teams)
+        self.allocate_entries(home_teams, booked_teams=self.replayed_teams)
+        if self.local_search_ms > 0:
+            with ALLOCATION_PHASE_LATENCY.time(phase='local_search'):
+                self.improvement = LocalSearch(self).run(self.local_search_ms)
+        ALLOCATION_TEAMS.inc(len(self.allocations), outcome='allocated')
+        ALLOCATION_TEAMS.inc(len(self.unallocated_teams), outcome='unallocated')
+        self.log_unallocated_teams()
+        logger.info("Allocation process completed.")
+
+    def allocate_entries(self, home_teams, booked_teams=()):
+        """
+        Place the teams in home_teams (grouped by age like config['home_teams'])
+        around whatever the state already has booked. booked_teams are counted
+        towards demand in the feasibility report.
+        """
         start_time = self.start_time
         end_of_day = self.end_time
 
-        teams_with_pref, teams_without_pref = self.prepare_teams()
-        # Sort pitches by capacity ascendingly, then by cost
-        self.pitches.sort(key=lambda p: (p.capacity, p.cost))
+        with ALLOCATION_PHASE_LATENCY.time(phase='prepare'):
+            teams_with_pref, teams_without_pref = self.prepare_teams(home_teams)
 
-        # Sort teams with preferences by preferred time (earlier first)
-        teams_with_pref.sort(key=lambda x: x[1])
+            # Bound supply against demand per capacity class before searching
+            all_teams = [team for team, _ in teams_with_pref] + teams_without_pref
+            self.feasibility = analyse_feasibility(self.pitches, all_teams + list(booked_teams), start_time, end_of_day)
+            log_feasibility(self.feasibility)
+            # Teams with no pitch of their capacity can never be placed, so skip the search for them
+            unplaceable = [team for team in all_teams if self.feasibility[get_pitch_type(team)].supply == 0]
+            if unplaceable:
+                teams_with_pref = [(team, pref) for team, pref in teams_with_pref if team not in unplaceable]
+                teams_without_pref = [team for team in teams_without_pref if team not in unplaceable]
+
+            # Sort teams with preferences by preferred time (earlier first)
+            teams_with_pref.sort(key=lambda x: x[1])
+            self.preferred_times.update((team.id, pref) for team, pref in teams_with_pref)
 
         # Allocate teams with preferences first
-        self.allocate_preferred_teams(teams_with_pref, start_time, end_of_day)
+        with ALLOCATION_PHASE_LATENCY.time(phase='preferred'):
+            self.allocate_preferred_teams(teams_with_pref, start_time, end_of_day)
+        self.check_cancelled()
         # Allocate remaining teams to free pitches first
-        self.allocate_remaining_teams(teams_without_pref, start_time, end_of_day, self.free_pitches)
+        with ALLOCATION_PHASE_LATENCY.time(phase='free_sweep'):
+            self.allocate_remaining_teams(teams_without_pref, start_time, end_of_day, self.free_pitches)
 
         # If there are still unallocated teams, try to allocate them to paid pitches
         if self.unallocated_teams:
             logger.info("Attempting to allocate remaining teams to paid pitches.")
-            self.allocate_remaining_teams(self.unallocated_teams, start_time, end_of_day, self.paid_pitches)
+            with ALLOCATION_PHASE_LATENCY.time(phase='paid_sweep'):
+                self.allocate_remaining_teams(self.unallocated_teams, start_time, end_of_day, self.paid_pitches)
 
-        self.log_unallocated_teams()
-        logger.info("Allocation process completed.")
+        self.unallocated_teams.extend(unplaceable)
+
+    def replay_previous_allocations(self, home_teams):
+        """
+        Book each team into the pitch and kick-off it had in the previous allocation,
+        where that slot is still valid: the pitch is selected, the kick-off is within
+        the window and the team's preferred time tolerance, and the pitch and those
+        overlapping it are free. Teams with preferred times go first, earliest first.
+        Returns the home_teams entries that still need a normal search.
+        """
+        previous = {record['team']: record for record in self.previous_allocations}
+        teams_with_pref, teams_without_pref = self.prepare_teams(home_teams)
+        teams_with_pref.sort(key=lambda x: x[1])
+        self.preferred_times.update((team.id, pref) for team, pref in teams_with_pref)
+
+        replayed = set()
+        for team, pref_time in teams_with_pref + [(team, None) for team in teams_without_pref]:
+            record = previous.get(team.format_label())
+            if record is None:
+                continue
+            pitch = self.pitch_name_map.get(pitch_label(record))
+            kick_off = self.parse_allocation_time(record['time'])
+            if pitch is None or kick_off is None or kick_off < self.start_time:
+                continue
+            shift_minutes = int((kick_off - pref_time).total_seconds() // 60) if pref_time else 0
+            if pref_time and abs(kick_off - pref_time) > self.preferred_tolerance:
+                continue
+            if self.try_allocate_team(team, kick_off, self.end_time, pitch, preferred=pref_time is not None, shift_minutes=shift_minutes):
+                replayed.add(team.id)
+                self.replayed_teams.append(team)
+
+        logger.info(f"Kept {len(replayed)} teams in their previous slots; searching for {len(teams_with_pref) + len(teams_without_pref) - len(replayed)}.")
+        remaining = {}
+        for age, entries in home_teams.items():
+            selected = [entry for entry in entries if int(entry['id']) not in replayed]
+            if selected:
+                remaining[age] = selected
+        return remaining
+
+    def check_cancelled(self):
+        """Abort the run if the caller has signalled cancellation or the deadline has passed."""
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            logger.info("Allocation process cancelled.")
+            raise AllocationCancelled()
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            logger.info("Allocation process ran out of time.")
+            raise AllocationTimedOut()
 
     def reset_allocation_state(self):
-        """Reset allocations and unallocated teams."""
-        self.allocations = []
-        self.unallocated_teams = []
-        for pitch in self.pitches:
-            pitch.reset_matches()
+        """Start again from an empty schedule."""
+        self.state = ScheduleState()
+        self.replayed_teams = []
 
-    def prepare_teams(self):
+    def prepare_teams(self, home_teams=None):
         teams_with_pref = []
         teams_without_pref = []
-        for age, team_entries in self.config['home_teams'].items():
+        home_teams = home_teams if home_teams is not None else self.config['home_teams']
+        for age, team_entries in home_teams.items():
             if not team_entries:
                 logger.info(f"No teams under age group '{age}'. Skipping allocation for this group.")
                 continue
@@ -119,16 +250,32 @@ class Allocator:
             logger.warning(str(e))
             return None
 
+    def parse_allocation_time(self, time_str):
+        """Parse a kick-off as written in allocations (e.g. '09:30am') onto the run's date."""
+        try:
+            return datetime.combine(self.start_time.date(), datetime.strptime(time_str, "%I:%M%p").time())
+        except ValueError:
+            logger.warning(f"Invalid allocation time: '{time_str}'.")
+            return None
+
     def allocate_preferred_teams(self, teams_with_pref, start_time, end_of_day):
         allocated_pref_teams = set()
-        random.shuffle(teams_with_pref)
+        if self.ordering == MOST_CONSTRAINED_ORDER:
+            booked = self.booked_by_capacity()
+            teams_with_pref.sort(key=lambda item: self.eligibility.constraint_key(
+                item[0], item[1], self.preferred_tolerance, booked.get(get_pitch_type(item[0]), 0)))
+        else:
+            self.random.shuffle(teams_with_pref)
         for team, pref_time in teams_with_pref:
-            if pref_time > end_of_day:
+            self.check_cancelled()
+            if pref_time - self.preferred_tolerance > end_of_day:
                 logger.info(f"Cannot schedule {team.format_label()} at preferred time {pref_time.strftime('%H:%M')} as it starts after {end_of_day.strftime('%H:%M')}.")
                 self.unallocated_teams.append(team)
                 continue
             
-            allocated = self.try_allocate_team(team, pref_time, end_of_day, preferred=True)
+            allocated = pref_time <= end_of_day and self.try_allocate_team(team, pref_time, end_of_day, preferred=True)
+            if not allocated and self.preferred_tolerance:
+                allocated = self.allocate_nearest_preferred(team, pref_time, start_time, end_of_day)
             logger.info(f"allocated: {allocated}")
             if allocated:
                 allocated_pref_teams.add(team)
@@ -136,6 +283,61 @@ class Allocator:
                 self.unallocated_teams.append(team)
 
         return allocated_pref_teams
+
+    def allocate_nearest_preferred(self, team, pref_time, start_time, end_of_day):
+        """Place a team at the free kick-off closest to its preferred time, within the tolerance."""
+        duration = get_duration(get_pitch_type(team))
+        earliest = max(start_time, pref_time - self.preferred_tolerance)
+        latest = min(end_of_day, pref_time + self.preferred_tolerance)
+
+        best = None
+        # Pitches are visited cheapest first, so ties on distance go to the cheaper pitch
+        for pitch in self.eligibility.pitches_for(team):
+            candidate = self.find_nearest_start(pitch, pref_time, duration, earliest, latest)
+            if candidate is not None and (best is None or abs(candidate - pref_time) < abs(best[1] - pref_time)):
+                best = (pitch, candidate)
+
+        if best is None:
+            return False
+        pitch, kick_off = best
+        shift_minutes = int((kick_off - pref_time).total_seconds() // 60)
+        logger.info(f"Moving {team.format_label()} {shift_minutes:+d} minutes from preferred time {pref_time.strftime('%H:%M')}.")
+        return self.try_allocate_team(team, kick_off, end_of_day, pitch, preferred=True, shift_minutes=shift_minutes)
+
+    def find_nearest_start(self, pitch, preferred_time, duration, earliest, latest):
+        """
+        Return the kick-off closest to preferred_time within [earliest, latest] at which
+        the pitch and every pitch overlapping it are free, or None. Each step jumps
+        straight past the blocking match, so the search never scans slot by slot.
+        Ties go to the later kick-off.
+        """
+        blockers = [pitch] + [self.pitch_id_map[pid] for pid in pitch.overlaps_with if pid in self.pitch_id_map]
+
+        def conflicts_at(kick_off):
+            return [match for match in (self.state.find_conflict(p, kick_off, kick_off + duration) for p in blockers) if match]
+
+        later = max(preferred_time, earliest)
+        while later <= latest:
+            conflicts = conflicts_at(later)
+            if not conflicts:
+                break
+            later = max(match['end'] for match in conflicts)
+        else:
+            later = None
+
+        earlier = min(preferred_time, latest)
+        while earlier >= earliest:
+            conflicts = conflicts_at(earlier)
+            if not conflicts:
+                break
+            earlier = min(match['start'] for match in conflicts) - duration
+        else:
+            earlier = None
+
+        candidates = [kick_off for kick_off in (later, earlier) if kick_off is not None]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda kick_off: (abs(kick_off - preferred_time), kick_off < preferred_time))
     
     def allocate_remaining_teams(self, teams, start_time, end_of_day, specific_pitches=None):
         pitches_to_use = specific_pitches if specific_pitches else self.pitches
@@ -144,15 +346,34 @@ class Allocator:
         teams_to_allocate = set(teams) | set(self.unallocated_teams)
         # Clear the unallocated_teams list as we're now considering all teams
         self.unallocated_teams = []
+        # Don't sweep for teams that have no pitch of their capacity in this set
+        capacities = {pitch.capacity for pitch in pitches_to_use}
+        skipped_teams = {team for team in teams_to_allocate if get_pitch_type(team) not in capacities}
+        teams_to_allocate -= skipped_teams
+        if self.ordering == MOST_CONSTRAINED_ORDER:
+            booked = self.booked_by_capacity()
+            priority = sorted(teams_to_allocate, key=lambda t: self.eligibility.constraint_key(
+                t, booked=booked.get(get_pitch_type(t), 0)))
         while teams_to_allocate and start_time <= end_of_day:
+            self.check_cancelled()
             allocated_this_slot = False
             for pitch in sorted_pitches:
                 if not teams_to_allocate:
                     break
 
-                teams_list = list(teams_to_allocate)
-                random.shuffle(teams_list)
+                if self.ordering == MOST_CONSTRAINED_ORDER:
+                    teams_list = [team for team in priority if team in teams_to_allocate]
+                else:
+                    teams_list = sorted(teams_to_allocate, key=lambda t: t.id)
+                    self.random.shuffle(teams_list)
+                # Every team that fits this pitch plays the same length of match, so if
+                # the slot is taken none of them can have it
+                if not self.is_pitch_free(pitch, start_time, get_duration(pitch.capacity)):
+                    continue
                 for team in teams_list:
+                    # Only teams of the pitch's size can use it
+                    if get_pitch_type(team) != pitch.capacity:
+                        continue
                     if self.try_allocate_team(team, start_time, end_of_day, pitch):
                         teams_to_allocate.remove(team)
                         allocated_this_slot = True
@@ -163,9 +384,24 @@ class Allocator:
             start_time += timedelta(minutes=15)
 
         # Update unallocated teams
-        self.unallocated_teams = list(teams_to_allocate)
+        self.unallocated_teams = sorted(teams_to_allocate | skipped_teams, key=lambda t: t.id)
+
+    def is_pitch_free(self, pitch, start_time, duration):
+        """Whether the pitch and every selected pitch overlapping it are free for the match."""
+        if not self.state.is_available(pitch, start_time, duration):
+            return False
+        return all(self.state.is_available(self.pitch_id_map[pid], start_time, duration)
+                   for pid in pitch.overlaps_with if pid in self.pitch_id_map)
 
-    def try_allocate_team(self, team, start_time, end_of_day, specific_pitch=None, preferred=False):
+    def booked_by_capacity(self):
+        """Matches already booked in each capacity class."""
+        booked = {}
+        for alloc in self.allocations:
+            capacity = self.pitch_id_map[alloc['pitch_id']].capacity
+            booked[capacity] = booked.get(capacity, 0) + 1
+        return booked
+
+    def try_allocate_team(self, team, start_time, end_of_day, specific_pitch=None, preferred=False, shift_minutes=0):
         pitch_type = get_pitch_type(team)
         duration = get_duration(pitch_type)
 
@@ -173,24 +409,21 @@ class Allocator:
             logger.info(f"Cannot schedule {team.format_label()} as it starts after {end_of_day.strftime('%H:%M')}.")
             return False
         
-        # Sort pitches by cost ascending to prioritize cheaper pitches
-        sorted_pitches = sorted(
-            [specific_pitch] if specific_pitch else self.pitches,
-            key=lambda p: p.cost
-        )
+        # The index lists the team's pitches by cost ascending to prioritize cheaper pitches
+        candidate_pitches = [specific_pitch] if specific_pitch else self.eligibility.pitches_for(team)
 
-        for pitch in sorted_pitches:
+        for pitch in candidate_pitches:
             if pitch.capacity != pitch_type:
                 continue
 
-            if not pitch.is_available(start_time, duration):
+            if not self.state.is_available(pitch, start_time, duration):
                 continue
 
             # Check overlapping pitches
             overlapping = [self.pitch_id_map[pid] for pid in pitch.overlaps_with if pid in self.pitch_id_map]
             overlap_conflict = False
             for overlapping_pitch in overlapping:
-                if overlapping_pitch.is_available(start_time, duration) is False:
+                if not self.state.is_available(overlapping_pitch, start_time, duration):
                     overlap_conflict = True
                     logger.info(f"Cannot allocate {team.format_label()} to '{pitch.format_label()}' because overlapping pitch '{overlapping_pitch.format_label()}' is occupied at {start_time.strftime('%H:%M')}.")
                     break
@@ -198,18 +431,24 @@ class Allocator:
                 continue
 
             # Allocate the team to the pitch
-            pitch.add_match(team, start_time, duration)
-            self.allocations.append({
-                'time': start_time.strftime("%I:%M%p").lower(),
-                'team': team.format_label(),
-                'pitch': f"{pitch.format_label()}",
-                'preferred': preferred
-            })
+            self.book_match(team, pitch, start_time, duration, preferred, shift_minutes)
             logger.info(f"Allocated {team.format_label()} to pitch '{pitch.format_label()}' at {start_time.strftime('%H:%M')}.")
             return True
 
         return False
 
+    def book_match(self, team, pitch, start_time, duration, preferred=False, shift_minutes=0):
+        """Book the team onto the pitch and record its allocation entry."""
+        self.state.book(pitch, team, start_time, duration, {
+            'time': start_time.strftime("%I:%M%p").lower(),
+            'team': team.format_label(),
+            'team_id': team.id,
+            'pitch': f"{pitch.format_label()}",
+            'pitch_id': pitch.id,
+            'preferred': preferred,
+            'shift_minutes': shift_minutes
+        })
+
     def log_unallocated_teams(self):
         if self.unallocated_teams:
             logger.info("=== Unallocated Teams ===")
@@ -0,0 +1,70 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from allocator.logger import setup_logger
+from allocator.metrics import CACHE_REQUESTS
+
+logger = setup_logger(__name__)
+
+
+def make_cache_key(*parts):
+    """Build a stable hash from JSON-serialisable parts, independent of dict ordering."""
+    canonical = json.dumps(parts, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache with a per-entry TTL.
+    Entries can be tagged (e.g. with a username) so everything belonging
+    to that tag can be invalidated at once.
+    """
+
+    def __init__(self, name, max_entries=256, ttl=3600):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                CACHE_REQUESTS.inc(cache=self.name, result='miss')
+                return None
+            value, tag, expires_at = entry
+            if time.monotonic() > expires_at:
+                del self.entries[key]
+                self.misses += 1
+                CACHE_REQUESTS.inc(cache=self.name, result='miss')
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            CACHE_REQUESTS.inc(cache=self.name, result='hit')
+            return value
+
+    def set(self, key, value, tag=None):
+        with self.lock:
+            self.entries[key] = (value, tag, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, tag):
+        """Drop every entry stored with the given tag."""
+        with self.lock:
+            stale = [key for key, (_, entry_tag, _) in self.entries.items() if entry_tag == tag]
+            for key in stale:
+                del self.entries[key]
+        if stale:
+            logger.info(f"Invalidated {len(stale)} cached results for '{tag}'.")
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
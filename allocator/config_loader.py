@@ -1,45 +1,63 @@
 import json  # Import JSON library alongside YAML
 import os
-import boto3
-from botocore.exceptions import ClientError
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from allocator.models.pitch import Pitch
 from allocator.models.team import Team
 from allocator.models.player import Player
 from allocator.logger import setup_logger
+from allocator.metrics import STORAGE_LATENCY
+from allocator.storage import S3_BUCKET, decode_body, get_s3_client, put_text
 
 logger = setup_logger(__name__)
 
-# S3 Configuration
-S3_BUCKET = 'owpitchalloc'  # Ensure this matches your bucket name
-s3_client = boto3.client('s3')
-
 # Determine the absolute path to the directory containing config_loader.py
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
+# Worker threads for concurrent fetches; keep below the client's connection pool size
+FETCH_WORKERS = 16
+_fetch_executor = None
+_fetch_executor_lock = threading.Lock()
+
 def load_json_from_s3(key):
     """Load JSON data from s3."""
+    return load_json_document_from_s3(key)[0]
+
+def load_json_document_from_s3(key):
+    """Load JSON data from S3 along with the object's ETag."""
+    from botocore.exceptions import ClientError
     try:
-        response = s3_client.get_object(Bucket=S3_BUCKET, Key=key)
-        data = response['Body'].read().decode('utf-8')
-        return json.loads(data)
+        with STORAGE_LATENCY.time(operation='load_json_from_s3'):
+            response = get_s3_client().get_object(Bucket=S3_BUCKET, Key=key)
+            return json.loads(decode_body(response)), response.get('ETag')
     except ClientError as e:
         logger.error(f"Failed to load {key} from S3: {e}")
         raise FileNotFoundError(f"File {key} not found in S3.")
 
+def get_object_etag(key):
+    """Return the ETag of an S3 object without downloading it."""
+    from botocore.exceptions import ClientError
+    try:
+        with STORAGE_LATENCY.time(operation='head_object'):
+            return get_s3_client().head_object(Bucket=S3_BUCKET, Key=key).get('ETag')
+    except ClientError:
+        raise FileNotFoundError(f"File {key} not found in S3.")
+
 def save_json_to_s3(key, data):
-    """Save JSON data to S3."""
+    """Save JSON data to S3 as compact, compressed JSON."""
+    from botocore.exceptions import ClientError
     try:
-        s3_client.put_object(
-            Bucket=S3_BUCKET,
-            Key=key,
-            Body=json.dumps(data, indent=4),
-            ContentType='application/json'
-        )
+        with STORAGE_LATENCY.time(operation='save_json_to_s3'):
+            put_text(key, to_compact_json(data), content_type='application/json')
         logger.info(f"Successfully saved {key} to S3.")
     except ClientError as e:
         logger.error(f"Failed to save {key} to S3: {e}")
         raise e
 
+def to_compact_json(data):
+    """Serialize data as JSON without whitespace."""
+    return json.dumps(data, separators=(',', ':'))
+
 def get_config_key(config_type, username):
     """Generate S3 key for the configuration file."""
     return f"configs/{username}/{config_type}.json"
@@ -48,20 +66,94 @@ def get_default_config_key(config_type):
     """Generate S3 key for the default configuration file."""
     return f"configs/{config_type}.json"
 
-def load_pitches(username=None):
-    """Load pitches from S3."""
-    if username:
-        key = get_config_key('pitches', username)
-    else:
-        key = get_default_config_key('pitches')
-    
-    try:
-        all_pitches_data = load_json_from_s3(key)
-    except FileNotFoundError:
-        logger.warning(f"{key} not found. Loading default pitches.")
-        key = get_default_config_key('pitches')
-        all_pitches_data = load_json_from_s3(key)
-    
+class ConfigRequestLoader:
+    """
+    Loads config documents for a single request.
+    The documents a request needs are requested concurrently over the shared S3
+    client, and each key is fetched at most once per loader. The default
+    fallback is only requested once the user's document turns out to be missing.
+    """
+
+    def __init__(self, username=None):
+        self.username = username
+        self.futures = {}
+        self.head_futures = {}
+        self.lock = threading.Lock()
+
+    def candidate_keys(self, config_type):
+        """Keys to try for a config type, in order of preference."""
+        keys = []
+        if self.username:
+            keys.append(get_config_key(config_type, self.username))
+        keys.append(get_default_config_key(config_type))
+        return keys
+
+    def fetch(self, key):
+        """Start fetching a key (if not already started) and return its future."""
+        with self.lock:
+            if key not in self.futures:
+                self.futures[key] = get_fetch_executor().submit(load_json_document_from_s3, key)
+            return self.futures[key]
+
+    def fetch_etag(self, key):
+        """Return a future for the key's ETag, reusing a full fetch if one was started."""
+        with self.lock:
+            if key in self.futures:
+                return self.futures[key]
+            if key not in self.head_futures:
+                self.head_futures[key] = get_fetch_executor().submit(get_object_etag, key)
+            return self.head_futures[key]
+
+    def prefetch(self, *config_types):
+        """Start fetching the preferred document for every config type the request will need."""
+        for config_type in config_types:
+            self.fetch(self.candidate_keys(config_type)[0])
+        return self
+
+    def prefetch_versions(self, *config_types):
+        """Start fetching the ETag of the preferred document for every config type."""
+        for config_type in config_types:
+            self.fetch_etag(self.candidate_keys(config_type)[0])
+        return self
+
+    def load_document(self, config_type):
+        """Return the user's document for config_type, falling back to the default."""
+        return self.load_versioned_document(config_type)[0]
+
+    def load_versioned_document(self, config_type):
+        """Return (document, ETag) for config_type, falling back to the default."""
+        return self.resolve(config_type, self.fetch)
+
+    def version(self, config_type):
+        """
+        ETag of the document load_document(config_type) returns. Uses HEAD requests
+        unless the document has already been fetched, so it is cheap to call first.
+        """
+        result = self.resolve(config_type, self.fetch_etag)
+        return result[1] if isinstance(result, tuple) else result
+
+    def resolve(self, config_type, start):
+        """Try each candidate key in turn and return the first that exists."""
+        keys = self.candidate_keys(config_type)
+        for key in keys:
+            try:
+                return start(key).result()
+            except FileNotFoundError:
+                if key == keys[-1]:
+                    raise
+                logger.warning(f"{key} not found. Loading default {config_type}.")
+
+def get_fetch_executor():
+    """Return the shared thread pool used for concurrent S3 fetches."""
+    global _fetch_executor
+    if _fetch_executor is None:
+        with _fetch_executor_lock:
+            if _fetch_executor is None:
+                _fetch_executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix='s3-fetch')
+    return _fetch_executor
+
+def parse_pitches(all_pitches_data):
+    """Build Pitch objects from a pitches document."""
     all_pitches = {Pitch(**pitch).format_label(): Pitch(**pitch) for pitch in all_pitches_data['pitches']}
     allowed_pitch_labels = set(all_pitches.keys())
 
@@ -71,28 +163,14 @@ def load_pitches(username=None):
         if pitch:
             filtered_pitches.append(pitch)
         else:
-            logger.warning(f"Pitch with label '{label}' not found in {key}.")
+            logger.warning(f"Pitch with label '{label}' not found.")
 
     # Sort pitches by capacity: 5-aside, 7-aside, 9-aside, then 11-aside
     filtered_pitches.sort(key=lambda pitch: {5: 0, 7: 1, 9: 2, 11: 3}.get(pitch.capacity, 4))
-    logger.info(f"Loaded {len(filtered_pitches)} pitches from S3.")
-
     return filtered_pitches
 
-def load_teams(username=None):
-    """Load teams from S3."""
-    if username:
-        key = get_config_key('teams', username)
-    else:
-        key = get_default_config_key('teams')
-    
-    try:
-        teams_data = load_json_from_s3(key)
-    except FileNotFoundError:
-        logger.warning(f"{key} not found. Loading default teams.")
-        key = get_default_config_key('teams')
-        teams_data = load_json_from_s3(key)
-    
+def parse_teams(teams_data):
+    """Build Team objects from a teams document."""
     teams = []
     for team in teams_data['teams']:
         try:
@@ -103,36 +181,44 @@ def load_teams(username=None):
             teams.append(Team(id, name, age, gender))
         except ValueError:
             logger.error(f"Invalid team format: '{team}'. Expected JSON.")
-    
+    return teams
+
+def parse_players(all_players_data):
+    """Build Player objects from a players document."""
+    return [Player(**player) for player in all_players_data['players']]
+
+def load_pitches(username=None, loader=None):
+    """Load pitches from S3."""
+    loader = loader or ConfigRequestLoader(username)
+    filtered_pitches = parse_pitches(loader.load_document('pitches'))
+    logger.info(f"Loaded {len(filtered_pitches)} pitches from S3.")
+    return filtered_pitches
+
+def load_teams(username=None, loader=None):
+    """Load teams from S3."""
+    loader = loader or ConfigRequestLoader(username)
+    teams = parse_teams(loader.load_document('teams'))
     logger.info(f"Loaded {len(teams)} teams from S3.")
     return teams
 
-def load_players(username=None):
+def load_players(username=None, loader=None):
     """
     Load players from S3. If username is provided, load user-specific players.
     Otherwise, load default players.
     """
-    if username:
-        key = get_config_key('players', username)
-    else:
-        key = get_default_config_key('players')
-    
+    loader = loader or ConfigRequestLoader(username)
     try:
-        all_players_data = load_json_from_s3(key)
+        all_players_data = loader.load_document('players')
     except FileNotFoundError:
-        logger.warning(f"{key} not found. Loading default players.")
-        key = get_default_config_key('players')
-        all_players_data = load_json_from_s3(key)
-    except s3_client.exceptions.NoSuchKey:
-        logger.warning(f"Players config not found for key: {key}")
-        return []
+        logger.warning(f"Players config not found for user: {username}")
+        raise
     except Exception as e:
         logger.error(f"Error loading players: {e}")
         raise e
     
-    logger.info(f"all_players_data: {all_players_data}")
-    players = [Player(**player) for player in all_players_data['players']]
-    return players 
+    players = parse_players(all_players_data)
+    logger.info(f"Loaded {len(players)} players from S3.")
+    return players
 
 def save_players(username, players):
     """
@@ -146,8 +232,68 @@ def save_players(username, players):
     
     players_data = [player.to_dict() for player in players]
     try:
-        s3_client.put_object(Bucket=S3_BUCKET, Key=key, Body=json.dumps(players_data))
+        put_text(key, to_compact_json(players_data), content_type='application/json')
         logger.info(f"Players config saved to {key}.")
     except Exception as e:
         logger.error(f"Error saving players: {e}")
-        raise e
\ No newline at end of file
+        raise e
+
+def load_document_from_file(path):
+    """Read a YAML (.yml/.yaml) or JSON config document from disk."""
+    with open(path, 'r', encoding='utf-8') as f:
+        if os.path.splitext(path)[1].lower() in ('.yml', '.yaml'):
+            import yaml  # Only needed for offline runs
+            return yaml.safe_load(f) or {}
+        return json.load(f)
+
+def load_pitches_from_file(path):
+    """Load pitches from a local YAML or JSON file."""
+    pitches = parse_pitches(load_document_from_file(path))
+    logger.info(f"Loaded {len(pitches)} pitches from '{path}'.")
+    return pitches
+
+def load_teams_from_file(path):
+    """Load teams from a local YAML or JSON file."""
+    teams = parse_teams(load_document_from_file(path))
+    logger.info(f"Loaded {len(teams)} teams from '{path}'.")
+    return teams
+
+def normalise_time(value):
+    """
+    Return a time as 'HH:MM'. YAML 1.1 reads unquoted times such as 10:30 as
+    base-60 integers (630), so those are converted back.
+    """
+    if isinstance(value, int):
+        return f"{value // 60:02d}:{value % 60:02d}"
+    return str(value).strip()
+
+def load_allocation_config(path):
+    """
+    Load an allocation request from a local YAML or JSON file, in the same shape
+    the web application builds: date, start_time, end_time, optional pitch ids and
+    home_teams mapping each age group to team ids with optional preferred times.
+    """
+    config = load_document_from_file(path)
+    if not isinstance(config, dict) or not config.get('home_teams'):
+        raise ValueError(f"Allocation config '{path}' has no home_teams.")
+
+    if config.get('date') is not None:
+        config['date'] = str(config['date'])  # YAML parses unquoted dates
+    for field in ('start_time', 'end_time'):
+        if config.get(field) is not None:
+            config[field] = normalise_time(config[field])
+
+    home_teams = {}
+    for age, entries in config['home_teams'].items():
+        home_teams[age] = []
+        for entry in entries or []:
+            # Entries may be bare team ids or {'id': ..., 'preferred_time': ...}
+            if not isinstance(entry, dict):
+                entry = {'id': entry}
+            preferred_time = entry.get('preferred_time')
+            home_teams[age].append({
+                'id': str(entry['id']),
+                'preferred_time': normalise_time(preferred_time) if preferred_time is not None else ''
+            })
+    config['home_teams'] = home_teams
+    return config
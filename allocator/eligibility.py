@@ -0,0 +1,53 @@
+from allocator.feasibility import slots_per_pitch
+from allocator.utils import get_pitch_type, get_duration
+
+# Orders in which the greedy passes consider teams
+RANDOM_ORDER = 'random'
+MOST_CONSTRAINED_ORDER = 'most_constrained'
+ORDERINGS = (RANDOM_ORDER, MOST_CONSTRAINED_ORDER)
+
+
+class EligibilityIndex:
+    """
+    The pitches each capacity class can use (cheapest first) and the kick-offs
+    they offer, built once per run so teams are only ever tried on pitches of
+    their size, and so teams can be ranked by how few slots they could take.
+    """
+
+    def __init__(self, pitches, start_time, end_time):
+        self.start_time = start_time
+        self.end_time = end_time
+        self.pitches_by_capacity = {}
+        for pitch in sorted(pitches, key=lambda p: p.cost):
+            self.pitches_by_capacity.setdefault(pitch.capacity, []).append(pitch)
+
+    def pitches_for(self, team):
+        return self.pitches_by_capacity.get(get_pitch_type(team), [])
+
+    def window(self, preferred_time=None, tolerance=None):
+        """Earliest and latest kick-off a team may take: its preferred window, or the whole day."""
+        if preferred_time is None:
+            return self.start_time, self.end_time
+        return max(self.start_time, preferred_time - tolerance), min(self.end_time, preferred_time + tolerance)
+
+    def eligible_slots(self, team, preferred_time=None, tolerance=None, booked=0):
+        """Back-to-back matches the team's pitches can host within its window, less booked ones."""
+        earliest, latest = self.window(preferred_time, tolerance)
+        per_pitch = slots_per_pitch(earliest, latest, get_duration(get_pitch_type(team)))
+        return max(0, len(self.pitches_for(team)) * per_pitch - booked)
+
+    def constraint_key(self, team, preferred_time=None, tolerance=None, booked=0):
+        """
+        Sort key putting the most constrained teams first: fewest eligible
+        pitch-slots, then longest matches, then tightest window. Ties go to the
+        earlier preferred kick-off (so same-pitch teams pack from the start of
+        the day), then by id so the order is deterministic.
+        """
+        earliest, latest = self.window(preferred_time, tolerance)
+        return (
+            self.eligible_slots(team, preferred_time, tolerance, booked),
+            -get_duration(get_pitch_type(team)),
+            latest - earliest,
+            preferred_time or self.start_time,
+            team.id
+        )
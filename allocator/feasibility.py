@@ -0,0 +1,151 @@
+from allocator.utils import get_pitch_type, get_duration
+from allocator.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Overlap groups larger than this use their size as the bound instead of an exact search
+MAX_EXACT_GROUP_SIZE = 12
+
+
+class CapacityBound:
+    """Upper bound on the matches a capacity class can host compared with its demand."""
+
+    def __init__(self, capacity, pitch_count, usable_pitches, slots_per_pitch, duration, demand):
+        self.capacity = capacity
+        self.pitch_count = pitch_count
+        self.usable_pitches = usable_pitches
+        self.slots_per_pitch = slots_per_pitch
+        self.duration = duration
+        self.demand = demand
+
+    @property
+    def supply(self):
+        """Maximum number of matches that can be played in this class."""
+        return self.usable_pitches * self.slots_per_pitch
+
+    @property
+    def supply_minutes(self):
+        return self.supply * int(self.duration.total_seconds() // 60)
+
+    @property
+    def demand_minutes(self):
+        return self.demand * int(self.duration.total_seconds() // 60)
+
+    @property
+    def shortfall(self):
+        """Teams that cannot be placed even in the best case."""
+        return max(0, self.demand - self.supply)
+
+    @property
+    def feasible(self):
+        return self.shortfall == 0
+
+    def to_dict(self):
+        return {
+            'capacity': self.capacity,
+            'pitches': self.pitch_count,
+            'usable_pitches': self.usable_pitches,
+            'supply': self.supply,
+            'supply_minutes': self.supply_minutes,
+            'demand': self.demand,
+            'demand_minutes': self.demand_minutes,
+            'shortfall': self.shortfall,
+            'feasible': self.feasible
+        }
+
+
+def slots_per_pitch(start_time, end_time, duration):
+    """Back-to-back matches a single pitch can host when kick-offs must be no later than end_time."""
+    if end_time < start_time:
+        return 0
+    return int((end_time - start_time) // duration) + 1
+
+
+def max_independent_pitches(pitches):
+    """
+    Largest number of pitches that can be in use at the same time, given that
+    overlapping pitches cannot host matches simultaneously.
+    """
+    pitch_ids = {pitch.id for pitch in pitches}
+    neighbours = {pitch.id: set() for pitch in pitches}
+    for pitch in pitches:
+        for other_id in pitch.overlaps_with:
+            if other_id in pitch_ids and other_id != pitch.id:
+                neighbours[pitch.id].add(other_id)
+                neighbours[other_id].add(pitch.id)
+
+    total = 0
+    seen = set()
+    for pitch_id in neighbours:
+        if pitch_id in seen:
+            continue
+        # Collect the connected overlap group
+        group = []
+        stack = [pitch_id]
+        seen.add(pitch_id)
+        while stack:
+            current = stack.pop()
+            group.append(current)
+            for other_id in neighbours[current]:
+                if other_id not in seen:
+                    seen.add(other_id)
+                    stack.append(other_id)
+        total += group_independence(group, neighbours)
+    return total
+
+
+def group_independence(group, neighbours):
+    if len(group) == 1:
+        return 1
+    if len(group) > MAX_EXACT_GROUP_SIZE:
+        return len(group)
+    index = {pitch_id: i for i, pitch_id in enumerate(group)}
+    conflict_masks = [sum(1 << index[other] for other in neighbours[pitch_id]) for pitch_id in group]
+    best = 1
+    for mask in range(1, 1 << len(group)):
+        size = bin(mask).count('1')
+        if size <= best:
+            continue
+        if all(not (mask & conflict_masks[i]) for i in range(len(group)) if mask & (1 << i)):
+            best = size
+    return best
+
+
+def analyse_feasibility(pitches, teams, start_time, end_time):
+    """
+    Compare the pitch capacity available in each capacity class with the teams
+    that need it. Overlap groups of up to MAX_EXACT_GROUP_SIZE pitches are solved
+    exactly, which is exponential in the group size; larger groups fall back to
+    their size as the bound. Returns a dict of capacity -> CapacityBound.
+    """
+    demand = {}
+    for team in teams:
+        capacity = get_pitch_type(team)
+        demand[capacity] = demand.get(capacity, 0) + 1
+
+    pitches_by_capacity = {}
+    for pitch in pitches:
+        pitches_by_capacity.setdefault(pitch.capacity, []).append(pitch)
+
+    bounds = {}
+    for capacity in sorted(set(demand) | set(pitches_by_capacity)):
+        class_pitches = pitches_by_capacity.get(capacity, [])
+        duration = get_duration(capacity)
+        bounds[capacity] = CapacityBound(
+            capacity,
+            len(class_pitches),
+            max_independent_pitches(class_pitches) if class_pitches else 0,
+            slots_per_pitch(start_time, end_time, duration),
+            duration,
+            demand.get(capacity, 0)
+        )
+    return bounds
+
+
+def log_feasibility(bounds):
+    for bound in bounds.values():
+        if not bound.feasible:
+            logger.warning(
+                f"{bound.capacity}aside is over-subscribed: {bound.demand} teams for at most "
+                f"{bound.supply} matches (short by {bound.shortfall})."
+            )
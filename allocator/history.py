@@ -0,0 +1,38 @@
+from allocator.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# What save_allocation_results stores when a run placed nobody
+NO_ALLOCATIONS = "No allocations available."
+
+
+def parse_allocation_text(content, source='allocation'):
+    """
+    Parse a stored allocation file ("time - team - capacity - pitch - preferred"
+    per line, capacity groups separated by blank lines) into records of
+    time, team, capacity, pitch and preferred. Malformed lines are skipped.
+    """
+    records = []
+    if content.strip() == NO_ALLOCATIONS:
+        return records
+    for line in content.split('\n'):
+        if not line.strip():
+            continue  # Blank lines separate capacity groups
+        parts = line.split(' - ')
+        if len(parts) != 5:
+            logger.warning(f"Skipping malformed line in file '{source}': {line}")
+            continue
+        time_str, team, capacity, pitch, preferred_str = parts
+        records.append({
+            'time': time_str.strip(),
+            'team': team.strip(),
+            'capacity': capacity.strip(),
+            'pitch': pitch.strip(),
+            'preferred': preferred_str.strip().lower() == 'true'
+        })
+    return records
+
+
+def pitch_label(record):
+    """The Pitch.format_label() of the pitch a record was played on."""
+    return f"{record['capacity']} - {record['pitch']}"
@@ -0,0 +1,148 @@
+import abc
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from allocator.allocator_base import AllocationCancelled
+from allocator.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+
+ACTIVE_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+
+
+class JobLimitExceeded(Exception):
+    """Raised when a user already has the maximum number of active jobs."""
+
+
+class Job:
+    def __init__(self, username, func, args):
+        self.id = uuid.uuid4().hex
+        self.username = username
+        self.func = func
+        self.args = args
+        self.status = JOB_QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.future = None
+
+    def is_active(self):
+        return self.status in ACTIVE_STATUSES
+
+    def to_dict(self):
+        """Serialize the job status (and result once finished) to a dictionary."""
+        data = {
+            'job_id': self.id,
+            'status': self.status,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at
+        }
+        if self.status == JOB_COMPLETED:
+            data['result'] = self.result
+        elif self.status == JOB_FAILED:
+            data['error'] = self.error
+        return data
+
+
+class JobQueue(abc.ABC):
+    """
+    Interface for allocation job backends.
+    Jobs are callables invoked as func(*args, cancel_event) by a worker.
+    """
+
+    @abc.abstractmethod
+    def submit(self, username, func, *args):
+        """Queue func(*args, cancel_event) for the user and return its Job."""
+
+    @abc.abstractmethod
+    def get(self, job_id):
+        """Return the job, or None if it is unknown or has expired."""
+
+    @abc.abstractmethod
+    def cancel(self, job_id):
+        """Cancel an active job; returns False if it has already finished."""
+
+
+class InProcessJobQueue(JobQueue):
+    """Runs jobs on a bounded local thread pool and keeps results in memory."""
+
+    def __init__(self, max_workers=2, max_jobs_per_user=2, result_ttl=600):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='allocation-job')
+        self.max_jobs_per_user = max_jobs_per_user
+        self.result_ttl = result_ttl
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, username, func, *args):
+        with self.lock:
+            self._purge_expired()
+            active = sum(1 for job in self.jobs.values() if job.username == username and job.is_active())
+            if active >= self.max_jobs_per_user:
+                raise JobLimitExceeded(f"User '{username}' already has {active} active jobs.")
+            job = Job(username, func, args)
+            self.jobs[job.id] = job
+        job.future = self.executor.submit(self._run, job)
+        logger.info(f"Queued allocation job {job.id} for user '{username}'.")
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            self._purge_expired()
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Cancel a job. Queued jobs never start; running jobs are signalled to stop."""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if not job or not job.is_active():
+                return False
+            job.cancel_event.set()
+            if job.future and job.future.cancel():
+                self._finish(job, JOB_CANCELLED)
+        logger.info(f"Cancellation requested for allocation job {job_id}.")
+        return True
+
+    def _run(self, job):
+        with self.lock:
+            if job.cancel_event.is_set():
+                self._finish(job, JOB_CANCELLED)
+                return
+            job.status = JOB_RUNNING
+        try:
+            result = job.func(*job.args, job.cancel_event)
+        except AllocationCancelled:
+            logger.info(f"Allocation job {job.id} stopped after cancellation.")
+            with self.lock:
+                self._finish(job, JOB_CANCELLED)
+            return
+        except Exception as e:
+            logger.error(f"Allocation job {job.id} failed: {e}")
+            with self.lock:
+                job.error = str(e)
+                self._finish(job, JOB_CANCELLED if job.cancel_event.is_set() else JOB_FAILED)
+            return
+        with self.lock:
+            job.result = result
+            self._finish(job, JOB_CANCELLED if job.cancel_event.is_set() else JOB_COMPLETED)
+
+    def _finish(self, job, status):
+        job.status = status
+        job.finished_at = time.time()
+        logger.info(f"Allocation job {job.id} {status}.")
+
+    def _purge_expired(self):
+        """Drop finished jobs whose results are older than the result TTL."""
+        now = time.time()
+        expired = [job_id for job_id, job in self.jobs.items()
+                   if job.finished_at is not None and now - job.finished_at > self.result_ttl]
+        for job_id in expired:
+            del self.jobs[job_id]
@@ -0,0 +1,228 @@
+import time
+from datetime import timedelta
+from allocator.utils import get_pitch_type, get_duration
+from allocator.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Weights of the schedule cost; the ordering mirrors the greedy passes' priorities
+UNALLOCATED_PENALTY = 1000
+PREFERRED_MISS_PENALTY = 100
+SHIFT_PENALTY_PER_MINUTE = 1
+SLOT_INTERVAL = timedelta(minutes=15)
+
+
+class LocalSearch:
+    """
+    Improve an allocator's finished schedule within a time budget, using three
+    neighbourhoods:
+
+    - move: put a team (allocated or not) in a cheaper free slot
+    - swap: exchange the slots of two teams of the same capacity
+    - ejection chain: give a team an occupied slot and move the teams in the
+      way to free slots
+
+    The schedule cost is a sum of per-team costs (pitch cost, preferred-time
+    misses and shifts, unallocated penalty), so each candidate is scored by the
+    change in the teams it touches rather than by re-scoring the schedule.
+    """
+
+    def __init__(self, allocator):
+        self.allocator = allocator
+        self.state = allocator.state
+        self.preferred_times = allocator.preferred_times
+        self.tolerance_minutes = allocator.preferred_tolerance.total_seconds() / 60
+        self.pitches_by_capacity = allocator.eligibility.pitches_by_capacity
+        self.slots = []
+        kick_off = allocator.start_time
+        while kick_off <= allocator.end_time:
+            self.slots.append(kick_off)
+            kick_off += SLOT_INTERVAL
+        self.teams_by_id = {team.id: team for team in allocator.teams}
+        self.counts = {'moves': 0, 'swaps': 0, 'ejections': 0}
+        self.deadline = None
+
+    def team_cost(self, team, pitch=None, start_time=None):
+        if pitch is None:
+            return UNALLOCATED_PENALTY
+        cost = pitch.cost
+        preferred_time = self.preferred_times.get(team.id)
+        if preferred_time is not None:
+            shift = abs((start_time - preferred_time).total_seconds()) / 60
+            cost += PREFERRED_MISS_PENALTY if shift > self.tolerance_minutes else shift * SHIFT_PENALTY_PER_MINUTE
+        return cost
+
+    def current_slot(self, team):
+        """(pitch, start) the team is booked at, or (None, None)."""
+        placement = self.state.placement(team.id)
+        if placement is None:
+            return None, None
+        pitch_id, match = placement
+        return self.allocator.pitch_id_map[pitch_id], match['start']
+
+    def schedule_cost(self):
+        return sum(self.team_cost(team, *self.current_slot(team)) for team in self.teams())
+
+    def teams(self):
+        booked = [self.teams_by_id[alloc['team_id']] for alloc in self.state.allocations]
+        return sorted(booked, key=lambda t: t.id) + list(self.state.unallocated_teams)
+
+    def is_free(self, pitch, start_time, duration):
+        if not self.state.is_available(pitch, start_time, duration):
+            return False
+        return all(self.state.is_available(self.allocator.pitch_id_map[pitch_id], start_time, duration)
+                   for pitch_id in pitch.overlaps_with if pitch_id in self.allocator.pitch_id_map)
+
+    def candidate_slots(self, team, below):
+        """(cost, start, pitch id, pitch) for every slot the team could use costing less than below, cheapest first."""
+        starts = list(self.slots)
+        preferred_time = self.preferred_times.get(team.id)
+        if preferred_time is not None and self.allocator.start_time <= preferred_time <= self.allocator.end_time:
+            starts.append(preferred_time)
+        candidates = []
+        for pitch in self.pitches_by_capacity.get(get_pitch_type(team), []):
+            for start_time in starts:
+                cost = self.team_cost(team, pitch, start_time)
+                if cost < below:
+                    candidates.append((cost, start_time, pitch.id, pitch))
+        return sorted(candidates, key=lambda c: c[:3])
+
+    def best_free_slot(self, team, below):
+        """Cheapest free (pitch, start, cost) for an unbooked team costing less than below, or None."""
+        duration = get_duration(get_pitch_type(team))
+        # Only the cheapest available candidate matters, so check availability in cost order
+        for cost, start_time, _, pitch in self.candidate_slots(team, below):
+            if self.is_free(pitch, start_time, duration):
+                return pitch, start_time, cost
+        return None
+
+    def place(self, team, pitch, start_time):
+        if pitch is None:
+            self.state.unallocated_teams.append(team)
+            return
+        preferred_time = self.preferred_times.get(team.id)
+        shift_minutes = int((start_time - preferred_time).total_seconds() // 60) if preferred_time else 0
+        preferred = preferred_time is not None and abs(shift_minutes) <= self.tolerance_minutes
+        self.allocator.book_match(team, pitch, start_time, get_duration(get_pitch_type(team)), preferred, shift_minutes)
+
+    def try_move(self, team):
+        pitch, start_time = self.current_slot(team)
+        current = self.team_cost(team, pitch, start_time)
+        self.state.release([team.id])
+        best = self.best_free_slot(team, current)
+        if best is None:
+            self.place(team, pitch, start_time)
+            return 0
+        self.place(team, best[0], best[1])
+        self.counts['moves'] += 1
+        return best[2] - current
+
+    def try_swap(self, team, others):
+        """Swap the team's slot with the first same-capacity team where that lowers the cost."""
+        pitch, start_time = self.current_slot(team)
+        if pitch is None:
+            return 0
+        for other in others:
+            other_pitch, other_start = self.current_slot(other)
+            if other_pitch is None or other is team or other_pitch.capacity != pitch.capacity:
+                continue
+            delta = (self.team_cost(team, other_pitch, other_start) + self.team_cost(other, pitch, start_time)
+                     - self.team_cost(team, pitch, start_time) - self.team_cost(other, other_pitch, other_start))
+            if delta < 0:
+                # Same capacity means same duration, so the swapped matches fit exactly
+                self.state.release([team.id, other.id])
+                self.place(team, other_pitch, other_start)
+                self.place(other, pitch, start_time)
+                self.counts['swaps'] += 1
+                return delta
+        return 0
+
+    def try_ejection(self, team):
+        """
+        Put the team in an occupied slot that is cheaper for it, moving every match
+        in the way (on that pitch or one overlapping it) to its cheapest free slot.
+        The chain is undone unless the total cost goes down.
+        """
+        pitch, start_time = self.current_slot(team)
+        current = self.team_cost(team, pitch, start_time)
+        duration = get_duration(get_pitch_type(team))
+        for cost, target_start, _, target in self.candidate_slots(team, current):
+            if time.perf_counter() >= self.deadline:
+                return 0
+            ejected = self.teams_in_the_way(target, target_start, duration, team)
+            if not ejected:
+                continue
+            originals = [(moved, *self.current_slot(moved)) for moved in [team] + ejected]
+            self.state.release([moved.id for moved, _, _ in originals])
+            self.place(team, target, target_start)
+            placed = [team]
+            delta = cost - current
+            for occupant, occupant_pitch, occupant_start in originals[1:]:
+                occupant_cost = self.team_cost(occupant, occupant_pitch, occupant_start)
+                best = self.best_free_slot(occupant, occupant_cost - delta)
+                if best is None:
+                    break
+                self.place(occupant, best[0], best[1])
+                placed.append(occupant)
+                delta += best[2] - occupant_cost
+            else:
+                if delta < 0:
+                    self.counts['ejections'] += 1
+                    return delta
+            self.state.release([moved.id for moved in placed])
+            for moved, moved_pitch, moved_start in originals:
+                self.place(moved, moved_pitch, moved_start)
+        return 0
+
+    def teams_in_the_way(self, pitch, start_time, duration, team):
+        """Teams booked on the pitch, or a pitch overlapping it, during the slot."""
+        pitches = [pitch] + [self.allocator.pitch_id_map[pitch_id] for pitch_id in pitch.overlaps_with
+                             if pitch_id in self.allocator.pitch_id_map]
+        team_ids = {match['team_id'] for p in pitches for match in self.state.conflicts(p, start_time, start_time + duration)}
+        team_ids.discard(team.id)
+        return [self.teams_by_id[team_id] for team_id in sorted(team_ids)]
+
+    def run(self, budget_ms):
+        """Search until no neighbourhood improves the schedule or the budget runs out; returns a report."""
+        started = time.perf_counter()
+        self.deadline = started + budget_ms / 1000
+        initial = self.summary()
+        cost = initial['cost']
+
+        improved = True
+        while improved and time.perf_counter() < self.deadline:
+            improved = False
+            teams = self.teams()
+            self.allocator.random.shuffle(teams)
+            for team in teams:
+                if time.perf_counter() >= self.deadline:
+                    break
+                self.allocator.check_cancelled()
+                delta = self.try_move(team)
+                if not delta and team.id in self.preferred_times:
+                    delta = self.try_swap(team, teams)
+                if not delta and self.team_cost(team, *self.current_slot(team)) > 0:
+                    delta = self.try_ejection(team)
+                if delta < 0:
+                    cost += delta
+                    improved = True
+
+        final = self.summary()
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"Local search lowered schedule cost from {initial['cost']} to {final['cost']} in {elapsed_ms}ms.")
+        return {
+            'initial': initial,
+            'final': final,
+            'improvement': round(initial['cost'] - cost, 2),
+            'elapsed_ms': elapsed_ms,
+            'budget_ms': budget_ms,
+            **self.counts
+        }
+
+    def summary(self):
+        return {
+            'cost': round(self.schedule_cost(), 2),
+            'unallocated': len(self.state.unallocated_teams),
+            'pitch_cost': sum(self.allocator.pitch_id_map[alloc['pitch_id']].cost for alloc in self.state.allocations),
+            'preferred_hits': sum(1 for alloc in self.state.allocations if alloc['preferred'])
+        }
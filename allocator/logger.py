@@ -1,6 +1,9 @@
 import logging
+import os
 import sys
 
+LOG_FILE = os.path.join("output", "allocator.log")
+
 def setup_logger(name):
     """Set up and return a logger with the given name."""
     logger = logging.getLogger(name)
@@ -12,7 +15,9 @@ def setup_logger(name):
         console_handler.setFormatter(formatter)
         logger.addHandler(console_handler)
         
-        file_handler = logging.FileHandler("output/allocator.log", mode='a')
+        # Create the log directory if needed and only open the file on first write
+        os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
+        file_handler = logging.FileHandler(LOG_FILE, mode='a', delay=True)
         file_handler.setFormatter(formatter)
         logger.addHandler(file_handler)
     
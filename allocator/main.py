@@ -1,39 +1,148 @@
+"""
+Offline batch allocation from local config files.
+
+Every allocation request (YAML or JSON) in a directory is allocated against
+the same pitches and teams files, spread across worker processes. Each result
+is written in the grouped format used by Allocator.save_allocations, and a
+summary.json records the outcome of every request.
+
+Usage:
+    python -m allocator.main --pitches data/pitches.yml --teams data/teams.yml
+        --requests data/requests/ [--output output/batch] [--workers 4]
+        [--start_time 09:00] [--end_time 14:00]
+"""
 import argparse
-from allocator.config_loader import load_pitches, load_teams, load_allocation_config
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from allocator.config_loader import load_pitches_from_file, load_teams_from_file, load_allocation_config
 from allocator.allocator_base import Allocator
 from allocator.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+REQUEST_EXTENSIONS = ('.yml', '.yaml', '.json')
+
 def parse_arguments():
-    parser = argparse.ArgumentParser(description="Allocate teams to pitches based on preferences and availability.")
+    parser = argparse.ArgumentParser(description="Allocate teams to pitches for a directory of allocation requests.")
+    parser.add_argument('--pitches', default='data/pitches.yml', help="Pitches file (YAML or JSON).")
+    parser.add_argument('--teams', default='data/teams.yml', help="Teams file (YAML or JSON).")
+    parser.add_argument('--requests', default='data/current_allocation.yml',
+                        help="Allocation request file, or a directory of them.")
+    parser.add_argument('--output', default='output', help="Directory for allocation files and summary.json.")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Worker processes.")
     parser.add_argument('--start_time', type=str, help="Override start time in HH:MM format.")
     parser.add_argument('--end_time', type=str, help="Override end time in HH:MM format.")
     return parser.parse_args()
 
-def main():
-    args = parse_arguments()
-    
-    allocation_config = load_allocation_config('data/current_allocation.yml')
-    pitches = load_pitches('data/pitches.yml', allocation_config)
-    teams = load_teams('data/teams.yml')
-    
-    allocator = Allocator(pitches, teams, allocation_config, args.start_time, args.end_time)
-    allocator.allocate()
-    # Get the date from the allocation_config
+def find_requests(path):
+    """The request file itself, or every YAML/JSON file in the directory, in name order."""
+    if os.path.isdir(path):
+        return [os.path.join(path, name) for name in sorted(os.listdir(path))
+                if name.lower().endswith(REQUEST_EXTENSIONS)]
+    return [path]
+
+def output_filename(request_path, allocation_config, used_names):
+    """allocations_<date>.txt, falling back to the request's file name when there is no date or it is taken."""
     allocation_date = allocation_config.get('date')
-    
+    stem = os.path.splitext(os.path.basename(request_path))[0]
     if allocation_date:
         # Format the date to be used in the filename
-        formatted_date = allocation_date.replace('-', '')
-        output_filename = f'output/allocations_{formatted_date}.txt'
+        name = f"allocations_{allocation_date.replace('-', '')}.txt"
     else:
-        # Fallback to a default filename if date is not available
-        logger.warning("Date not found in allocation config. Using default filename.")
-        output_filename = 'output/allocations_default.txt'
-    
-    # Save the allocations using the new filename
-    allocator.save_allocations(output_filename)
+        logger.warning(f"Date not found in '{request_path}'. Naming the output after the request file.")
+        name = f"allocations_{stem}.txt"
+    if name in used_names:
+        name = f"allocations_{stem}.txt"
+    return name
+
+def allocate_request(request_path, pitches_path, teams_path, output_path, start_time=None, end_time=None):
+    """Run one allocation request and save it; returns the summary entry. Runs in a worker process."""
+    started = time.perf_counter()
+    allocation_config = load_allocation_config(request_path)
+    pitches = load_pitches_from_file(pitches_path)
+    teams = load_teams_from_file(teams_path)
+
+    # Restrict to the requested pitches, as the web application does
+    if allocation_config.get('pitches'):
+        selected = {int(pitch_id) for pitch_id in allocation_config['pitches']}
+        pitches = [pitch for pitch in pitches if pitch.id in selected]
+
+    allocator = Allocator(pitches, teams, allocation_config, start_time, end_time, seed=allocation_config.get('seed'))
+    allocator.allocate()
+    allocator.save_allocations(output_path)
+
+    return {
+        'request': request_path,
+        'output': output_path,
+        'date': allocation_config.get('date'),
+        'status': 'ok',
+        'allocated': len(allocator.allocations),
+        'unallocated': [team.format_label() for team in allocator.unallocated_teams],
+        'feasibility': [bound.to_dict() for bound in allocator.feasibility.values()],
+        'improvement': allocator.improvement,
+        'elapsed_seconds': round(time.perf_counter() - started, 3)
+    }
+
+def run_batch(request_paths, pitches_path, teams_path, output_dir, workers, start_time=None, end_time=None):
+    """Allocate every request across a process pool and return the summary entries in request order."""
+    os.makedirs(output_dir, exist_ok=True)
+    outputs = {}
+    results = {}
+    for request_path in request_paths:
+        try:
+            allocation_config = load_allocation_config(request_path)
+        except Exception as e:
+            # Unreadable files, YAML/JSON syntax errors and malformed entries only fail this request
+            logger.error(f"Skipping invalid allocation request '{request_path}': {e}")
+            results[request_path] = {'request': request_path, 'status': 'error', 'error': str(e)}
+            continue
+        outputs[request_path] = output_filename(request_path, allocation_config, set(outputs.values()))
+
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {
+            executor.submit(allocate_request, request_path, pitches_path, teams_path,
+                            os.path.join(output_dir, name), start_time, end_time): request_path
+            for request_path, name in outputs.items()
+        }
+        for future in as_completed(futures):
+            request_path = futures[future]
+            try:
+                results[request_path] = future.result()
+                logger.info(f"Allocated '{request_path}' in {results[request_path]['elapsed_seconds']}s.")
+            except Exception as e:
+                logger.error(f"Allocation failed for '{request_path}': {e}")
+                results[request_path] = {'request': request_path, 'status': 'error', 'error': str(e)}
+
+    return [results[request_path] for request_path in request_paths]
+
+def main():
+    args = parse_arguments()
+
+    request_paths = find_requests(args.requests)
+    if not request_paths:
+        logger.error(f"No allocation requests found in '{args.requests}'.")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    entries = run_batch(request_paths, args.pitches, args.teams, args.output, args.workers, args.start_time, args.end_time)
+    failed = sum(1 for entry in entries if entry['status'] != 'ok')
+    summary = {
+        'requests': len(entries),
+        'succeeded': len(entries) - failed,
+        'failed': failed,
+        'elapsed_seconds': round(time.perf_counter() - started, 3),
+        'results': entries
+    }
+    summary_path = os.path.join(args.output, 'summary.json')
+    with open(summary_path, 'w') as f:
+        json.dump(summary, f, indent=4)
+    logger.info(f"Allocated {summary['succeeded']} of {len(entries)} requests; summary written to '{summary_path}'.")
+
+    if failed:
+        sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
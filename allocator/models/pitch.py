@@ -1,58 +1,45 @@
-from datetime import datetime
 from allocator.logger import setup_logger
 
 logger = setup_logger(__name__)
 
 class Pitch:
-    def __init__(self, id, name, capacity, location, cost=0, overlaps_with=None):
-        self.id = id
-        self.name = name
-        self.capacity = capacity
-        self.location = location
-        self.cost = cost
-        self.matches = []
-        self.overlaps_with = overlaps_with if overlaps_with else []
+    """
+    A pitch definition. Pitches are immutable so parsed configs can be cached and
+    shared by concurrent allocations; bookings live in allocator.schedule.ScheduleState.
+    """
+    __slots__ = ('id', 'name', 'capacity', 'location', 'cost', 'overlaps_with')
 
-    def add_match(self, team, start_time, duration):
-        if not isinstance(start_time, datetime):
-            logger.error("start_time must be a datetime.datetime object.")
-            return
+    def __init__(self, id, name, capacity, location, cost=0, overlaps_with=None):
+        set_field = super().__setattr__
+        set_field('id', id)
+        set_field('name', name)
+        set_field('capacity', capacity)
+        set_field('location', location)
+        set_field('cost', cost)
+        set_field('overlaps_with', tuple(overlaps_with) if overlaps_with else ())
 
-        end_time = start_time + duration
-        self.matches.append({
-            'team': team.format_label(),
-            'start': start_time,
-            'end': end_time
-        })
-        logger.debug(f"Match added: {team.format_label()} from {start_time.strftime('%H:%M')} to {end_time.strftime('%H:%M')}.")
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Pitch is immutable; cannot set '{name}'.")
 
-    def is_available(self, start_time, duration):
-        if not isinstance(start_time, datetime):
-            logger.error("start_time must be a datetime.datetime object.")
-            return False
+    def __delattr__(self, name):
+        raise AttributeError(f"Pitch is immutable; cannot delete '{name}'.")
 
-        end_time = start_time + duration
-        for match in self.matches:
-            if (match['start'] <= start_time < match['end']) or (start_time <= match['start'] < end_time):
-                return False
-        return True
+    def __reduce__(self):
+        # Rebuild through __init__ so pickling and copying work despite __setattr__
+        return (Pitch, (self.id, self.name, self.capacity, self.location, self.cost, self.overlaps_with))
 
     def format_label(self):
         return f"{self.capacity}aside - {self.name}"
     
-    def reset_matches(self):
-        """Reset all scheduled matches."""
-        self.matches = []
-
     def to_dict(self):
-        """Serialize Pitch object to a dictionary excluding 'matches'."""
+        """Serialize Pitch object to a dictionary."""
         return {
             'id': self.id,
             'name': self.name,
             'capacity': self.capacity,
             'location': self.location,
             'cost': self.cost,
-            'overlaps_with': self.overlaps_with
+            'overlaps_with': list(self.overlaps_with)
         }
     
     def __str__(self):
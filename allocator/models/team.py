@@ -1,11 +1,25 @@
 from allocator.utils import format_age_group
 
 class Team:
+    """A team definition. Teams are immutable so parsed configs can be shared between runs."""
+    __slots__ = ('id', 'name', 'age_group', 'gender')
+
     def __init__(self, id, name, age_group, gender):
-        self.id = id
-        self.name = name
-        self.age_group = age_group
-        self.gender = gender
+        set_field = super().__setattr__
+        set_field('id', id)
+        set_field('name', name)
+        set_field('age_group', age_group)
+        set_field('gender', gender)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Team is immutable; cannot set '{name}'.")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"Team is immutable; cannot delete '{name}'.")
+
+    def __reduce__(self):
+        # Rebuild through __init__ so pickling and copying work despite __setattr__
+        return (Team, (self.id, self.name, self.age_group, self.gender))
 
     def format_label(self):
         return f"{format_age_group(self.age_group)} {self.name}" + (f" ({self.gender})" if self.gender.lower() == 'girls' else "")
@@ -0,0 +1,80 @@
+import base64
+import bisect
+import json
+
+PLAYER_FIELDS = ('id', 'first_name', 'surname', 'team_id', 'shirt_number')
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(player_id):
+    """Opaque cursor pointing just past the given player id."""
+    return base64.urlsafe_b64encode(json.dumps({'after': player_id}).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    try:
+        after = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))['after']
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor '{cursor}'.") from e
+    # Player ids are integers; anything else cannot be compared with the index
+    if not isinstance(after, int) or isinstance(after, bool):
+        raise InvalidCursor(f"Invalid cursor '{cursor}'.")
+    return after
+
+
+def project(player, fields):
+    """Serialize a player, keeping only the requested fields (all of them if fields is empty)."""
+    data = player.to_dict()
+    return {field: data[field] for field in fields} if fields else data
+
+
+class PlayerIndex:
+    """
+    Read-only indexes over one players document: players by id, player ids by
+    team and a sorted list of lower-cased names for prefix search. Results are
+    returned in id order so pages can be resumed from the last id seen.
+    """
+
+    def __init__(self, players):
+        self.players = {player.id: player for player in players}
+        self.ids = sorted(self.players)
+        self.by_team = {}
+        names = []
+        for player_id in self.ids:
+            player = self.players[player_id]
+            self.by_team.setdefault(player.team_id, []).append(player_id)
+            # First name, surname and full name all match a prefix
+            for name in (player.first_name, player.surname, f"{player.first_name} {player.surname}"):
+                names.append((name.lower(), player_id))
+        names.sort()
+        self.names = names
+
+    def ids_with_name_prefix(self, prefix):
+        prefix = prefix.lower()
+        start = bisect.bisect_left(self.names, (prefix,))
+        matches = set()
+        for name, player_id in self.names[start:]:
+            if not name.startswith(prefix):
+                break
+            matches.add(player_id)
+        return matches
+
+    def query(self, team_id=None, name_prefix=None, after=None, limit=DEFAULT_PAGE_SIZE):
+        """
+        Return (players, next_after, total) for players matching every given filter.
+        next_after is the id to resume from, or None on the last page.
+        """
+        ids = self.by_team.get(team_id, []) if team_id is not None else self.ids
+        if name_prefix:
+            matches = self.ids_with_name_prefix(name_prefix)
+            ids = [player_id for player_id in ids if player_id in matches]
+
+        start = bisect.bisect_right(ids, after) if after is not None else 0
+        page = ids[start:start + limit]
+        next_after = page[-1] if start + limit < len(ids) else None
+        return [self.players[player_id] for player_id in page], next_after, len(ids)
@@ -0,0 +1,87 @@
+from concurrent.futures import ThreadPoolExecutor
+from allocator.allocator_base import Allocator
+from allocator.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class Scenario:
+    """
+    A what-if change to a baseline allocation: pitches that are closed and/or
+    new preferred kick-off times per age group (e.g. {'Under9s': '11:00'}).
+    """
+
+    def __init__(self, name, closed_pitches=None, preferred_times=None):
+        self.name = name
+        self.closed_pitches = {int(pitch_id) for pitch_id in closed_pitches or []}
+        self.preferred_times = preferred_times or {}
+
+    def apply_to_config(self, config):
+        """Copy of the allocation config with this scenario's preferred times applied."""
+        home_teams = {}
+        for age, entries in config['home_teams'].items():
+            if age in self.preferred_times:
+                home_teams[age] = [{**entry, 'preferred_time': self.preferred_times[age]} for entry in entries]
+            else:
+                home_teams[age] = entries
+        return {**config, 'home_teams': home_teams}
+
+
+class ScenarioResult:
+    def __init__(self, scenario, allocator, diff):
+        self.scenario = scenario
+        self.allocator = allocator
+        self.diff = diff
+
+    def to_dict(self):
+        return {
+            'name': self.scenario.name,
+            'allocations': self.allocator.allocations,
+            'unallocated': [team.format_label() for team in self.allocator.unallocated_teams],
+            'diff': self.diff
+        }
+
+
+def run_scenario(baseline, scenario, seed=None, state=None):
+    """
+    Evaluate a scenario on a fork of the baseline's schedule. Only the teams it
+    affects are re-planned: those on closed pitches, those whose preferred time
+    changed and those the baseline left unallocated. Everyone else keeps their slot.
+    state is a fork of the baseline's state to work on; one is taken if not given.
+    """
+    config = scenario.apply_to_config(baseline.config)
+    pitches = [pitch for pitch in baseline.pitches if pitch.id not in scenario.closed_pitches]
+    allocator = Allocator(
+        pitches, baseline.teams, config,
+        baseline.start_time.strftime('%H:%M'), baseline.end_time.strftime('%H:%M'),
+        cancel_event=baseline.cancel_event, seed=seed,
+        state=state if state is not None else baseline.state.fork()
+    )
+
+    affected = {team.id for team in baseline.unallocated_teams}
+    for pitch_id in scenario.closed_pitches:
+        affected.update(allocator.state.teams_on_pitch(pitch_id))
+    for age in scenario.preferred_times:
+        affected.update(int(entry['id']) for entry in config['home_teams'].get(age, []))
+    allocator.state.release(affected)
+
+    replan = {}
+    for age, entries in config['home_teams'].items():
+        selected = [entry for entry in entries if int(entry['id']) in affected]
+        if selected:
+            replan[age] = selected
+    logger.info(f"Scenario '{scenario.name}': re-planning {len(affected)} teams.")
+    # Teams that keep their baseline slot still count towards the feasibility demand
+    teams_by_id = {team.id: team for team in baseline.teams}
+    kept = [teams_by_id[team_id] for team_id in sorted(allocator.state.placements)]
+    allocator.allocate_entries(replan, booked_teams=kept)
+
+    return ScenarioResult(scenario, allocator, baseline.state.diff(allocator.state))
+
+
+def evaluate_scenarios(baseline, scenarios, max_workers=4, seed=None):
+    """Run each scenario against an allocated baseline concurrently; results are in scenario order."""
+    # Fork up front, from this thread, so the workers never touch the baseline state
+    forks = [(scenario, baseline.state.fork()) for scenario in scenarios]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda item: run_scenario(baseline, item[0], seed, item[1]), forks))
@@ -0,0 +1,160 @@
+import bisect
+
+
+class PitchSchedule:
+    """
+    Matches booked on one pitch, kept sorted by start time (with a parallel list
+    of starts) so availability checks are a binary search rather than a scan.
+    """
+
+    def __init__(self, matches=None, starts=None):
+        self.matches = matches if matches is not None else []
+        self.starts = starts if starts is not None else []
+
+    def copy(self):
+        return PitchSchedule(list(self.matches), list(self.starts))
+
+    def add(self, match):
+        index = bisect.bisect_right(self.starts, match['start'])
+        self.starts.insert(index, match['start'])
+        self.matches.insert(index, match)
+
+    def remove_team(self, team_id):
+        """Remove and return the team's match, or None if it has none here."""
+        for index, match in enumerate(self.matches):
+            if match['team_id'] == team_id:
+                del self.starts[index]
+                return self.matches.pop(index)
+        return None
+
+    def find_conflict(self, start_time, end_time):
+        """
+        Return the match overlapping [start_time, end_time), or None if the pitch is free.
+        Matches on a pitch never overlap each other, so only the last match
+        starting before end_time can conflict.
+        """
+        index = bisect.bisect_left(self.starts, end_time)
+        if index and self.matches[index - 1]['end'] > start_time:
+            return self.matches[index - 1]
+        return None
+
+    def conflicts(self, start_time, end_time):
+        """Every match overlapping [start_time, end_time)."""
+        found = []
+        index = bisect.bisect_left(self.starts, end_time)
+        while index and self.matches[index - 1]['end'] > start_time:
+            index -= 1
+            found.append(self.matches[index])
+        return found
+
+
+# Shared by every state for pitches with nothing booked; never written to
+EMPTY_SCHEDULE = PitchSchedule()
+
+
+class ScheduleState:
+    """
+    Occupancy of every pitch, plus the allocations and unallocated teams, for one
+    allocation run. Pitch and team definitions are not copied or modified.
+
+    fork() is cheap: the child shares its parent's per-pitch schedules and each
+    side copies a pitch's schedule only the first time it books or releases a
+    match on it. Fork before handing states to other threads; a state itself is
+    not safe to write from several threads at once.
+    """
+
+    def __init__(self):
+        self.schedules = {}
+        self.owned = set()  # Pitch ids whose schedule this state may modify in place
+        self.placements = {}  # Team id -> pitch id
+        self.allocations = []
+        self.unallocated_teams = []
+
+    def fork(self):
+        child = ScheduleState()
+        child.schedules = dict(self.schedules)
+        child.placements = dict(self.placements)
+        child.allocations = list(self.allocations)
+        child.unallocated_teams = list(self.unallocated_teams)
+        # The schedules are now shared, so neither side may write them in place
+        self.owned = set()
+        return child
+
+    def schedule(self, pitch_id):
+        return self.schedules.get(pitch_id, EMPTY_SCHEDULE)
+
+    def writable_schedule(self, pitch_id):
+        if pitch_id not in self.owned:
+            self.schedules[pitch_id] = self.schedule(pitch_id).copy()
+            self.owned.add(pitch_id)
+        return self.schedules[pitch_id]
+
+    def matches(self, pitch_id):
+        return self.schedule(pitch_id).matches
+
+    def find_conflict(self, pitch, start_time, end_time):
+        return self.schedule(pitch.id).find_conflict(start_time, end_time)
+
+    def conflicts(self, pitch, start_time, end_time):
+        return self.schedule(pitch.id).conflicts(start_time, end_time)
+
+    def is_available(self, pitch, start_time, duration):
+        return self.find_conflict(pitch, start_time, start_time + duration) is None
+
+    def book(self, pitch, team, start_time, duration, allocation):
+        """Record a match for the team on the pitch together with its allocation entry."""
+        self.writable_schedule(pitch.id).add({
+            'team': team.format_label(),
+            'team_id': team.id,
+            'start': start_time,
+            'end': start_time + duration
+        })
+        self.placements[team.id] = pitch.id
+        self.allocations.append(allocation)
+
+    def release(self, team_ids):
+        """Unbook the given teams, dropping their matches and allocations; returns the ids released."""
+        team_ids = set(team_ids)
+        released = set()
+        for team_id in team_ids:
+            pitch_id = self.placements.pop(team_id, None)
+            if pitch_id is not None:
+                self.writable_schedule(pitch_id).remove_team(team_id)
+                released.add(team_id)
+        if released:
+            self.allocations = [alloc for alloc in self.allocations if alloc['team_id'] not in released]
+        self.unallocated_teams = [team for team in self.unallocated_teams if team.id not in team_ids]
+        return released
+
+    def placement(self, team_id):
+        """(pitch id, match) for a booked team, or None if it is not booked."""
+        pitch_id = self.placements.get(team_id)
+        if pitch_id is None:
+            return None
+        return pitch_id, next(match for match in self.matches(pitch_id) if match['team_id'] == team_id)
+
+    def teams_on_pitch(self, pitch_id):
+        return [match['team_id'] for match in self.matches(pitch_id)]
+
+    def diff(self, other):
+        """
+        Describe how other differs from this state: teams newly placed, teams no
+        longer placed and teams moved to a different time or pitch.
+        """
+        before = {alloc['team_id']: alloc for alloc in self.allocations}
+        after = {alloc['team_id']: alloc for alloc in other.allocations}
+        moved = []
+        for team_id in before.keys() & after.keys():
+            old, new = before[team_id], after[team_id]
+            if (old['time'], old['pitch']) != (new['time'], new['pitch']):
+                moved.append({
+                    'team': new['team'],
+                    'from': {'time': old['time'], 'pitch': old['pitch']},
+                    'to': {'time': new['time'], 'pitch': new['pitch']}
+                })
+        return {
+            'added': [after[team_id] for team_id in sorted(after.keys() - before.keys())],
+            'removed': [before[team_id] for team_id in sorted(before.keys() - after.keys())],
+            'moved': sorted(moved, key=lambda change: change['team']),
+            'unchanged': len(before.keys() & after.keys()) - len(moved)
+        }
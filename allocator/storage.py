@@ -0,0 +1,65 @@
+import gzip
+import threading
+
+# S3 Configuration
+S3_BUCKET = 'owpitchalloc'  # Ensure this matches your bucket name
+
+# Connections kept open to S3; sized for concurrent fetches from several requests
+S3_MAX_POOL_CONNECTIONS = 32
+
+# Stored documents are gzip-compressed; objects written before this are read as-is
+CONTENT_ENCODING = 'gzip'
+GZIP_MAGIC = b'\x1f\x8b'
+
+_s3_client = None
+_client_lock = threading.Lock()
+
+def get_s3_client():
+    """
+    Return the shared S3 client, creating it on first use.
+    boto3 is imported here rather than at module level to keep cold start fast.
+    """
+    global _s3_client
+    if _s3_client is None:
+        with _client_lock:
+            if _s3_client is None:
+                import boto3
+                from botocore.config import Config
+                _s3_client = boto3.client('s3', config=Config(
+                    max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+                    tcp_keepalive=True,
+                    retries={'max_attempts': 3, 'mode': 'standard'}
+                ))
+    return _s3_client
+
+def set_s3_client(client):
+    """Replace the shared S3 client (e.g. with a local stand-in for benchmarks)."""
+    global _s3_client
+    with _client_lock:
+        _s3_client = client
+
+def encode_body(text):
+    """Compress text for storage."""
+    return gzip.compress(text.encode('utf-8'), compresslevel=6)
+
+def decode_body(response):
+    """Read an S3 get_object response body, decompressing it if it was stored compressed."""
+    body = response['Body'].read()
+    if response.get('ContentEncoding') == CONTENT_ENCODING or body[:2] == GZIP_MAGIC:
+        body = gzip.decompress(body)
+    return body.decode('utf-8')
+
+def put_text(key, text, content_type='text/plain'):
+    """Store text under key, compressed, with Content-Encoding metadata."""
+    get_s3_client().put_object(
+        Bucket=S3_BUCKET,
+        Key=key,
+        Body=encode_body(text),
+        ContentType=content_type,
+        ContentEncoding=CONTENT_ENCODING
+    )
+
+def get_text(key):
+    """Fetch the text stored under key, whether or not it was stored compressed."""
+    response = get_s3_client().get_object(Bucket=S3_BUCKET, Key=key)
+    return decode_body(response)
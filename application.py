@@ -1,23 +1,145 @@
+import gzip
+import hashlib
 import json
 import os
-from flask import Flask, request, jsonify, send_from_directory
-from allocator.allocator_base import Allocator
-from allocator.config_loader import load_pitches, load_teams, load_players, save_json_to_s3, get_config_key, get_default_config_key
+from flask import Flask, Response, request, jsonify, send_from_directory, stream_with_context, g
+from allocator.allocator_base import Allocator, AllocationCancelled, AllocationTimedOut
+from allocator.config_loader import ConfigRequestLoader, load_pitches, load_teams, load_players, parse_pitches, parse_teams, parse_players, save_json_to_s3, get_config_key, get_default_config_key
+from allocator.cache import ResultCache, make_cache_key
+from allocator.eligibility import ORDERINGS
+from allocator.history import parse_allocation_text
+from allocator.jobs import InProcessJobQueue, JobLimitExceeded
 from allocator.logger import setup_logger
+from allocator.player_index import PLAYER_FIELDS, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursor, PlayerIndex, decode_cursor, encode_cursor, project
+from allocator.metrics import REGISTRY, REQUEST_LATENCY, STORAGE_LATENCY, CACHE_REQUESTS
+from allocator.storage import S3_BUCKET, get_s3_client, decode_body, put_text, get_text
 from allocator.models.pitch import Pitch
 from allocator.models.team import Team
 from allocator.models.player import Player
 from datetime import datetime
-import boto3
-from botocore.exceptions import NoCredentialsError, PartialCredentialsError
 import re
+import threading
+import time
+
+try:
+    import brotli  # Optional: better compression for browsers that support it
+except ImportError:
+    brotli = None
 
 application = Flask(__name__)
 logger = setup_logger(__name__)
 
-# Let's use S3 for storage
-s3 = boto3.client('s3')
-BUCKET_NAME = 'owpitchalloc'
+# Let's use S3 for storage (the client is created lazily on first use)
+BUCKET_NAME = S3_BUCKET
+
+# Allocation jobs run on a small local worker pool so web workers are not tied up
+job_queue = InProcessJobQueue(max_workers=2, max_jobs_per_user=2, result_ttl=600)
+
+# Allocation results keyed by a hash of their inputs, invalidated on config changes
+allocation_cache = ResultCache('allocation_results', max_entries=256, ttl=3600)
+
+# Player indexes keyed by the players document version they were built from
+player_index_cache = ResultCache('player_index', max_entries=128, ttl=3600)
+
+# Parsed (immutable) pitches and teams, shared by concurrent allocations until the document changes
+config_object_cache = ResultCache('config_objects', max_entries=256, ttl=3600)
+CONFIG_PARSERS = {'pitches': parse_pitches, 'teams': parse_teams}
+
+# Previews answer within this budget, returning whatever was placed by then
+PREVIEW_BUDGET_MS = 50
+# Previews reuse the user's parsed configs for this long without asking S3 for their versions
+preview_config_cache = ResultCache('preview_configs', max_entries=256, ttl=30)
+# Finished previews keyed by their inputs, so toggling a selection back is instant
+preview_cache = ResultCache('previews', max_entries=1024, ttl=300)
+# Cancel event of the preview in flight for each (username, client id); a newer one cancels it
+active_previews = {}
+active_previews_lock = threading.Lock()
+
+# Built frontend assets (see build_assets.py) are served from here when present
+ASSET_DIST_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'frontend', 'dist')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# JSON responses smaller than this aren't worth compressing
+COMPRESS_MIN_BYTES = 500
+COMPRESS_ENCODINGS = ['br', 'gzip']
+
+# Upper bound on the optimisation time a client may ask for per allocation
+MAX_LOCAL_SEARCH_MS = 2000
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+def config_etag(loader, config_type):
+    """Strong ETag for a response built from the stored config_type document."""
+    version = loader.version(config_type)
+    # The query string is included because some responses are filtered views of the document
+    return hashlib.sha1(f"{request.full_path}|{config_type}|{version}".encode('utf-8')).hexdigest()
+
+def not_modified_response(loader, config_type):
+    """
+    Answer a conditional GET with 304 if the client's copy is still current.
+    Only the document's ETag is fetched, so the payload is never loaded or rebuilt.
+    Returns None if the full response is needed.
+    """
+    if not request.if_none_match:
+        return None
+    etag = config_etag(loader, config_type)
+    # Compressed responses carry the encoding in their ETag
+    for candidate in [etag] + [f"{etag}-{encoding}" for encoding in COMPRESS_ENCODINGS]:
+        if request.if_none_match.contains(candidate):
+            CACHE_REQUESTS.inc(cache='http_etag', result='hit')
+            response = application.response_class(status=304)
+            response.set_etag(candidate)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+    CACHE_REQUESTS.inc(cache='http_etag', result='miss')
+    return None
+
+def with_config_etag(response, loader, config_type):
+    """Tag a config response so browsers revalidate it instead of downloading it again."""
+    response.set_etag(config_etag(loader, config_type))
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@application.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@application.after_request
+def record_request_latency(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_LATENCY.observe(time.perf_counter() - started, method=request.method, route=route, status=response.status_code)
+    return response
+
+@application.route('/metrics', methods=['GET'])
+def metrics():
+    """Expose in-process metrics in the Prometheus text format."""
+    return application.response_class(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@application.after_request
+def compress_response(response):
+    """Compress JSON responses with brotli or gzip when the client accepts it."""
+    if (response.status_code != 200 or response.direct_passthrough or response.mimetype != 'application/json'
+            or 'Content-Encoding' in response.headers or (response.content_length or 0) < COMPRESS_MIN_BYTES):
+        return response
+
+    if brotli and request.accept_encodings['br']:
+        encoding = 'br'
+        body = brotli.compress(response.get_data())
+    elif request.accept_encodings['gzip']:
+        encoding = 'gzip'
+        body = gzip.compress(response.get_data(), compresslevel=6)
+    else:
+        return response
+
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak)
+    return response
 
 @application.route('/api/teams', methods=['GET'])
 def get_teams():
@@ -26,8 +148,12 @@ def get_teams():
         logger.error("Username not provided in query parameters.")
         return jsonify({'error': 'Username is required.'}), 400
     
+    loader = ConfigRequestLoader(username)
     try:
-        teams = load_teams(username=username)
+        not_modified = not_modified_response(loader, 'teams')
+        if not_modified:
+            return not_modified
+        teams = load_teams(username=username, loader=loader)
     except Exception as e:
         logger.error(f"Failed to load teams for user '{username}': {e}")
         return jsonify({'error': 'Failed to load teams.'}), 500
@@ -41,7 +167,7 @@ def get_teams():
             'gender': team.gender,
             'display_name': team.format_label()
         })
-    return jsonify({'teams': teams_data})
+    return with_config_etag(jsonify({'teams': teams_data}), loader, 'teams')
 
 @application.route('/api/pitches', methods=['GET'])
 def get_pitches():
@@ -50,8 +176,12 @@ def get_pitches():
         logger.error("Username not provided in query parameters.")
         return jsonify({'error': 'Username is required.'}), 400
     
+    loader = ConfigRequestLoader(username)
     try:
-        pitches = load_pitches(username=username)
+        not_modified = not_modified_response(loader, 'pitches')
+        if not_modified:
+            return not_modified
+        pitches = load_pitches(username=username, loader=loader)
     except Exception as e:
         logger.error(f"Failed to load pitches for user '{username}': {e}")
         return jsonify({'error': 'Failed to load pitches.'}), 500
@@ -64,10 +194,64 @@ def get_pitches():
             'capacity': pitch.capacity,
             'location': pitch.location,
             'cost': pitch.cost,
-            'overlaps_with': pitch.overlaps_with,
+            'overlaps_with': list(pitch.overlaps_with),
             'format_label': pitch.format_label()
         })
-    return jsonify({'pitches': pitches_data})
+    return with_config_etag(jsonify({'pitches': pitches_data}), loader, 'pitches')
+
+@application.route('/api/players', methods=['GET'])
+def query_players():
+    """
+    Page through the user's players, optionally filtered by team_id and a name
+    prefix (q). 'fields' limits the attributes returned and 'cursor' resumes
+    from the previous page's next_cursor.
+    """
+    username = request.cookies.get('username')
+    if not username:
+        logger.error("Username not found in cookies.")
+        return jsonify({'error': 'Username is required.'}), 400
+
+    try:
+        team_id = int(request.args['team_id']) if request.args.get('team_id') else None
+        limit = min(max(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'error': 'team_id and limit must be integers.'}), 400
+    fields = [field for field in request.args.get('fields', '').split(',') if field]
+    unknown_fields = [field for field in fields if field not in PLAYER_FIELDS]
+    if unknown_fields:
+        return jsonify({'error': f"Unknown player fields: {', '.join(unknown_fields)}."}), 400
+    try:
+        after = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+
+    loader = ConfigRequestLoader(username)
+    try:
+        not_modified = not_modified_response(loader, 'players')
+        if not_modified:
+            return not_modified
+        index = get_player_index(username, loader)
+    except FileNotFoundError:
+        return jsonify({'error': 'Default players config not found.'}), 404
+    except Exception as e:
+        logger.error(f"Failed to load players for user '{username}': {e}")
+        return jsonify({'error': 'Failed to load players.'}), 500
+
+    players, next_after, total = index.query(team_id=team_id, name_prefix=request.args.get('q'), after=after, limit=limit)
+    return with_config_etag(jsonify({
+        'players': [project(player, fields) for player in players],
+        'next_cursor': encode_cursor(next_after) if next_after is not None else None,
+        'total': total
+    }), loader, 'players')
+
+def get_player_index(username, loader):
+    """Indexes over the user's players document, rebuilt only when the document changes."""
+    index = player_index_cache.get(make_cache_key(username, loader.version('players')))
+    if index is None:
+        document, version = loader.load_versioned_document('players')
+        index = PlayerIndex(parse_players(document))
+        player_index_cache.set(make_cache_key(username, version), index, tag=username)
+    return index
 
 @application.route('/api/allocate', methods=['POST'])
 def allocate():
@@ -77,37 +261,321 @@ def allocate():
         logger.error("Username not found in cookies.")
         return jsonify({'allocations': [], 'logs': [{'level': 'error', 'message': 'User not authenticated.'}]}), 401
 
-    pitches = load_pitches(username=username)
-    teams = load_teams(username=username)
+    response_data, status = run_allocation(username, request.get_json())
+    return jsonify(response_data), status
+
+@application.route('/api/allocate/jobs', methods=['POST'])
+def submit_allocation_job():
+    """Queue an allocation run and return its job id for polling."""
+    username = request.cookies.get('username')
+    if not username:
+        logger.error("Username not found in cookies.")
+        return jsonify({'error': 'User not authenticated.'}), 401
+
+    try:
+        job = job_queue.submit(username, run_allocation, username, request.get_json())
+    except JobLimitExceeded as e:
+        logger.warning(str(e))
+        return jsonify({'error': 'Too many allocation jobs in progress. Please wait for one to finish.'}), 429
+
+    return jsonify({'job_id': job.id, 'status': job.status}), 202
+
+@application.route('/api/allocate/jobs/<job_id>', methods=['GET', 'DELETE'])
+def allocation_job(job_id):
+    """Poll the status and result of an allocation job, or cancel it."""
+    username = request.cookies.get('username')
+    if not username:
+        logger.error("Username not found in cookies.")
+        return jsonify({'error': 'User not authenticated.'}), 401
+
+    job = job_queue.get(job_id)
+    if not job or job.username != username:
+        return jsonify({'error': 'Job not found.'}), 404
+
+    if request.method == 'DELETE':
+        if not job_queue.cancel(job_id):
+            return jsonify({'error': f'Job already {job.status}.'}), 409
+        return jsonify({'job_id': job.id, 'status': job.status}), 200
+
+    job_data = job.to_dict()
+    result = job_data.pop('result', None)
+    if result:
+        response_data, status = result
+        job_data.update(response_data)
+        job_data['http_status'] = status
+    return jsonify(job_data), 200
+
+@application.route('/api/allocate/preview', methods=['POST'])
+def preview_allocation():
+    """
+    Summarise what an allocation of the current form would look like, without
+    saving it. A newer preview from the same client cancels this one.
+    """
+    username = request.cookies.get('username')
+    if not username:
+        logger.error("Username not found in cookies.")
+        return jsonify({'error': 'User not authenticated.'}), 401
+
+    data = request.get_json() or {}
+    preview_key = (username, data.get('client_id'))
+    cancel_event = threading.Event()
+    with active_previews_lock:
+        stale = active_previews.get(preview_key)
+        if stale is not None:
+            stale.set()
+        active_previews[preview_key] = cancel_event
+    try:
+        response_data, status = run_preview(username, data, cancel_event)
+    finally:
+        with active_previews_lock:
+            if active_previews.get(preview_key) is cancel_event:
+                del active_previews[preview_key]
+    return jsonify(response_data), status
+
+def run_preview(username, data, cancel_event):
+    """
+    Run a greedy-only allocation (no local search, warm start or persistence)
+    for up to PREVIEW_BUDGET_MS once the configs are loaded. Returns a
+    (response_data, status_code) tuple; 'complete' is False when the budget cut
+    it short, and the counts are None if nothing had been placed by then.
+    """
+    pitches, teams = load_preview_configs(username)
+    if not pitches or not teams:
+        return {'error': 'Initialization failed. Pitches or teams data missing.'}, 500
+    filtered_pitches, config, error = build_allocation_config(data, pitches, teams)
+    if error:
+        return error
+    config.pop('local_search_ms', None)
+
+    seed = data.get('seed')
+    selected_team_ids = {int(entry['id']) for entries in config['home_teams'].values() for entry in entries}
+    cache_key = make_cache_key(
+        sorted((pitch.to_dict() for pitch in filtered_pitches), key=lambda p: p['id']),
+        sorted((team.to_dict() for team in teams if team.id in selected_team_ids), key=lambda t: t['id']),
+        {age: sorted(entries, key=lambda e: int(e['id'])) for age, entries in config['home_teams'].items()},
+        config['start_time'],
+        config['end_time'],
+        config.get('preferred_time_tolerance'),
+        config.get('ordering'),
+        seed
+    )
+    cached = preview_cache.get(cache_key)
+    if cached is not None:
+        return cached, 200
+
+    # The budget covers the allocation only, so a cold config cache doesn't eat into it
+    started = time.perf_counter()
+    deadline = started + PREVIEW_BUDGET_MS / 1000
+    complete = True
+    try:
+        allocator = Allocator(filtered_pitches, teams, config, cancel_event=cancel_event, seed=seed, deadline=deadline)
+        allocator.allocate()
+    except AllocationTimedOut:
+        complete = False
+    except AllocationCancelled:
+        return {'error': 'Preview superseded by a newer one.'}, 409
+    except Exception as e:
+        logger.error(f"Allocation preview failed: {e}")
+        return {'error': 'Allocation preview failed.'}, 500
+
+    requested = sum(len(entries) for entries in config['home_teams'].values())
+    if not complete and not allocator.allocations:
+        # Cut off before the first placement: there is nothing meaningful to count yet
+        return {
+            'complete': False,
+            'allocated': None,
+            'unallocated': None,
+            'preferred_hits': None,
+            'projected_cost': None,
+            'feasibility': [bound.to_dict() for bound in allocator.feasibility.values()],
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+        }, 200
+    preview = {
+        'complete': complete,
+        'allocated': len(allocator.allocations),
+        'unallocated': requested - len(allocator.allocations),
+        'preferred_hits': sum(1 for alloc in allocator.allocations if alloc['preferred']),
+        'projected_cost': sum(allocator.pitch_id_map[alloc['pitch_id']].cost for alloc in allocator.allocations),
+        'feasibility': [bound.to_dict() for bound in allocator.feasibility.values()],
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+    }
+    if complete:
+        preview_cache.set(cache_key, preview, tag=username)
+    return preview, 200
+
+def load_preview_configs(username):
+    """
+    The user's parsed pitches and teams for previews. They are reused for a short
+    while without any S3 requests, since a slightly stale preview is harmless.
+    """
+    configs = preview_config_cache.get(username)
+    if configs is None:
+        loader = ConfigRequestLoader(username).prefetch_versions('pitches', 'teams')
+        configs = (load_config_objects(username, loader, 'pitches'), load_config_objects(username, loader, 'teams'))
+        preview_config_cache.set(username, configs, tag=username)
+    return configs
+
+def run_allocation(username, data, cancel_event=None):
+    """
+    Run an allocation for the user and persist the results.
+    Returns a (response_data, status_code) tuple so it can back both the
+    synchronous endpoint and queued jobs.
+    """
+    loader = ConfigRequestLoader(username).prefetch_versions('pitches', 'teams')
+    pitches = load_config_objects(username, loader, 'pitches')
+    teams = load_config_objects(username, loader, 'teams')
     if not pitches or not teams:
-        return jsonify({'allocations': [], 'logs': [{'level': 'error', 'message': 'Initialization failed. Pitches or teams data missing.'}]}), 500
+        return {'allocations': [], 'logs': [{'level': 'error', 'message': 'Initialization failed. Pitches or teams data missing.'}]}, 500
+
+    logger.info(f"Received allocation request for {username}.")
+    logger.debug(f"Allocation data: {data}")
+
+    filtered_pitches, config, error = build_allocation_config(data, pitches, teams)
+    if error:
+        return error
+    date = config['date']
+    start_time = config['start_time']
+    end_time = config['end_time']
+    # Start from the previous matchday's slots so schedules stay stable week to week
+    previous_allocations = load_previous_allocations(username, date) if data.get('warm_start') else []
+
+    # Identical requests against unchanged configs reuse the previous result
+    seed = data.get('seed')
+    selected_team_ids = {int(entry['id']) for entries in config['home_teams'].values() for entry in entries}
+    cache_key = make_cache_key(
+        sorted((pitch.to_dict() for pitch in filtered_pitches), key=lambda p: p['id']),
+        sorted((team.to_dict() for team in teams if team.id in selected_team_ids), key=lambda t: t['id']),
+        {age: sorted(entries, key=lambda e: int(e['id'])) for age, entries in config['home_teams'].items()},
+        start_time,
+        end_time,
+        config.get('preferred_time_tolerance'),
+        config.get('local_search_ms'),
+        config.get('ordering'),
+        previous_allocations,
+        seed
+    )
+    cached = allocation_cache.get(cache_key)
+    if cached is not None:
+        logger.info(f"Reusing cached allocation for {username}.")
+        formatted_allocations, unallocated_labels, feasibility, improvement, replayed = cached
+    else:
+        # Load and validate allocation configuration
+        try:
+            allocator = Allocator(filtered_pitches, teams, config, cancel_event=cancel_event, seed=seed,
+                                  previous_allocations=previous_allocations)
+            allocator.allocate()
+        except AllocationCancelled:
+            return {
+                'allocations': [],
+                'logs': [{'level': 'warning', 'message': 'Allocation cancelled.'}]
+            }, 409
+        except Exception as e:
+            logger.error(f"Allocation process failed: {e}")
+            return {
+                'allocations': [],
+                'logs': [{'level': 'error', 'message': 'Allocation process failed.'}]
+            }, 500
+
+        # Modify the allocations to include pitch capacity
+        formatted_allocations = []
+        for alloc in allocator.allocations:
+            pitch = next((p for p in pitches if p.format_label() == alloc['pitch']), None)
+            if pitch:
+                formatted_allocations.append({
+                    'time': alloc['time'],
+                    'team': alloc['team'],
+                    'pitch': alloc['pitch'],
+                    'capacity': pitch.capacity,
+                    'preferred': alloc['preferred'],
+                    'shift_minutes': alloc['shift_minutes']
+                })
 
-    data = request.get_json()
+        # Sort allocations by capacity and then by time
+        formatted_allocations.sort(key=lambda x: (x['capacity'], datetime.strptime(x['time'], "%I:%M%p")))
+        unallocated_labels = [team.format_label() for team in allocator.unallocated_teams]
+        feasibility = [bound.to_dict() for bound in allocator.feasibility.values()]
+        improvement = allocator.improvement
+        replayed = len(allocator.replayed_teams)
+        allocation_cache.set(cache_key, (formatted_allocations, unallocated_labels, feasibility, improvement, replayed), tag=username)
+
+    logger.info(f"Formatted allocations: {formatted_allocations}")
+    logs = [{'level': 'info', 'message': 'Allocation completed successfully.'}]
+    if previous_allocations:
+        logs.append({'level': 'info', 'message': f"Kept {replayed} teams in their slots from the previous matchday."})
+
+    if unallocated_labels:
+        unallocated = "\n".join(unallocated_labels)
+        logs.append({'level': 'warning', 'message': f'Unallocated Teams:\n{unallocated}'})
+
+    for bound in feasibility:
+        if not bound['feasible']:
+            logs.append({
+                'level': 'warning',
+                'message': f"{bound['capacity']}aside is over-subscribed: {bound['demand']} teams for at most {bound['supply']} matches (short by {bound['shortfall']})."
+            })
+
+    if improvement and improvement['improvement'] > 0:
+        logs.append({
+            'level': 'info',
+            'message': f"Optimisation improved the schedule in {improvement['elapsed_ms']}ms: unallocated teams "
+                       f"{improvement['initial']['unallocated']} -> {improvement['final']['unallocated']}, pitch cost "
+                       f"{improvement['initial']['pitch_cost']} -> {improvement['final']['pitch_cost']}."
+        })
+
+    # A cancelled run must not overwrite results saved by the submission that replaced it
+    if cancel_event is not None and cancel_event.is_set():
+        logger.info(f"Allocation for {username} cancelled; results not saved.")
+        return {
+            'allocations': [],
+            'logs': [{'level': 'warning', 'message': 'Allocation cancelled.'}]
+        }, 409
+
+    # Save Allocation Results to Output folder
+    save_allocation_results(username, date, formatted_allocations)
+
+    return {'allocations': formatted_allocations, 'logs': logs, 'feasibility': feasibility, 'improvement': improvement}, 200
+
+
+def parse_non_negative_int(value):
+    """Return value as an int if it is a whole number of 0 or more (or a string of one), else None."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value if value >= 0 else None
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value.strip())
+    return None
+
+def build_allocation_config(data, pitches, teams):
+    """
+    Validate an allocation request against the user's pitches and teams and build
+    the Allocator config from it. Returns (selected pitches, config, error), where
+    error is a (response_data, status_code) tuple if the request is invalid.
+    """
     date = data.get('date')
     start_time = data.get('start_time')
     end_time = data.get('end_time')
     selected_pitches = data.get('pitches', [])
     selected_teams = data.get('teams', [])
 
-    logger.info(f"Received allocation request for {username}.")
-    logger.debug(f"Allocation data: {data}")
-
     # Filter pitches based on selection
     selected_pitches = [int(pitch) for pitch in selected_pitches]
     filtered_pitches = [pitch for pitch in pitches if pitch.id in selected_pitches]
     if not filtered_pitches:
         logger.error("No pitches selected or available.")
-        return jsonify({
+        return None, None, ({
             'allocations': [],
+            'error': 'No pitches selected or available.',
             'logs': [{'level': 'error', 'message': 'No pitches selected or available.'}]
-        }), 400
+        }, 400)
     
     if not selected_teams:
         logger.error("No teams selected or available.")
-        return jsonify({
+        return None, None, ({
             'allocations': [],
+            'error': 'No teams selected or available.',
             'logs': [{'level': 'error', 'message': 'No teams selected or available.'}]
-        }), 400
+        }, 400)
 
     # Validate and process selected teams
     config = {
@@ -117,6 +585,33 @@ def allocate():
         'pitches': selected_pitches,
         'home_teams': {}
     }
+    if data.get('preferred_time_tolerance') is not None:
+        tolerance = parse_non_negative_int(data['preferred_time_tolerance'])
+        if tolerance is None:
+            return None, None, ({
+                'allocations': [],
+                'error': 'Preferred time tolerance must be a whole number of minutes, 0 or more.',
+                'logs': [{'level': 'error', 'message': 'Preferred time tolerance must be a whole number of minutes, 0 or more.'}]
+            }, 400)
+        config['preferred_time_tolerance'] = tolerance
+    if data.get('local_search_ms') is not None:
+        local_search_ms = parse_non_negative_int(data['local_search_ms'])
+        if local_search_ms is None:
+            return None, None, ({
+                'allocations': [],
+                'error': 'Optimisation time must be a whole number of milliseconds, 0 or more.',
+                'logs': [{'level': 'error', 'message': 'Optimisation time must be a whole number of milliseconds, 0 or more.'}]
+            }, 400)
+        if local_search_ms:
+            config['local_search_ms'] = min(local_search_ms, MAX_LOCAL_SEARCH_MS)
+    if data.get('ordering'):
+        if data['ordering'] not in ORDERINGS:
+            return None, None, ({
+                'allocations': [],
+                'error': f"Unknown team ordering. Expected one of: {', '.join(ORDERINGS)}.",
+                'logs': [{'level': 'error', 'message': f"Unknown team ordering. Expected one of: {', '.join(ORDERINGS)}."}]
+            }, 400)
+        config['ordering'] = data['ordering']
 
     for team_entry in selected_teams:
         preferred_time = team_entry.get('preferred_time', '').strip()
@@ -136,44 +631,43 @@ def allocate():
         except ValueError:
             logger.error(f"Invalid team id: '{id}'.")
 
-    # Load and validate allocation configuration
+    return filtered_pitches, config, None
+
+def load_config_objects(username, loader, config_type):
+    """
+    Parsed pitches or teams for the user. Only the document's ETag is fetched when
+    the parsed objects are already cached; they are immutable, so every request
+    for the same version shares them.
+    """
+    objects = config_object_cache.get(make_cache_key(username, config_type, loader.version(config_type)))
+    if objects is None:
+        document, version = loader.load_versioned_document(config_type)
+        objects = tuple(CONFIG_PARSERS[config_type](document))
+        config_object_cache.set(make_cache_key(username, config_type, version), objects, tag=username)
+    return objects
+
+def load_previous_allocations(username, date_str=None):
+    """
+    Parsed records of the user's latest stored allocation before date_str (or the
+    latest of all without a date), or [] if there is none.
+    """
     try:
-        allocator = Allocator(filtered_pitches, teams, config)
-        allocator.allocate()
+        cutoff = datetime.strptime(date_str, "%Y-%m-%d").date().isoformat() if date_str else None
+        dates = []
+        for key in iter_allocation_keys(get_s3_client(), username):
+            stored_date = key.split('/')[-1].split('.')[0]
+            if re.match(r'^\d{4}-\d{2}-\d{2}$', stored_date) and (cutoff is None or stored_date < cutoff):
+                dates.append(stored_date)
+        if not dates:
+            logger.info(f"No previous allocation found for user '{username}'.")
+            return []
+        key = f"allocations/{username}/{max(dates)}.txt"
+        with STORAGE_LATENCY.time(operation='get_object'):
+            content = get_text(key)
+        return parse_allocation_text(content, key)
     except Exception as e:
-        logger.error(f"Allocation process failed: {e}")
-        return jsonify({
-            'allocations': [],
-            'logs': [{'level': 'error', 'message': 'Allocation process failed.'}]
-        }), 500
-
-    # Modify the allocations to include pitch capacity
-    formatted_allocations = []
-    for alloc in allocator.allocations:
-        pitch = next((p for p in pitches if p.format_label() == alloc['pitch']), None)
-        if pitch:
-            formatted_allocations.append({
-                'time': alloc['time'],
-                'team': alloc['team'],
-                'pitch': alloc['pitch'],
-                'capacity': pitch.capacity,
-                'preferred': alloc['preferred']
-            })
-
-    # Sort allocations by capacity and then by time
-    formatted_allocations.sort(key=lambda x: (x['capacity'], datetime.strptime(x['time'], "%I:%M%p")))
-    logger.info(f"Formatted allocations: {formatted_allocations}")
-    logs = [{'level': 'info', 'message': 'Allocation completed successfully.'}]
-
-    if allocator.unallocated_teams:
-        unallocated = "\n".join([team.format_label() for team in allocator.unallocated_teams])
-        logs.append({'level': 'warning', 'message': f'Unallocated Teams:\n{unallocated}'})
-
-    # Save Allocation Results to Output folder
-    save_allocation_results(username, date, formatted_allocations)
-
-    return jsonify({'allocations': formatted_allocations, 'logs': logs})
-
+        logger.warning(f"Could not load the previous allocation for user '{username}': {e}")
+        return []
 
 def save_allocation_results(username, date_str, allocations):
     """
@@ -207,75 +701,68 @@ def save_allocation_results(username, date_str, allocations):
 
             result_text = result_text.strip()
 
+        from botocore.exceptions import NoCredentialsError, PartialCredentialsError
         try:
-            s3.put_object(Bucket=BUCKET_NAME, Key=s3_filename, Body=result_text)
+            with STORAGE_LATENCY.time(operation='put_object'):
+                put_text(s3_filename, result_text)
             logger.info(f"Allocation results saved to S3 bucket '{BUCKET_NAME}' with key '{s3_filename}'.")
         except (NoCredentialsError, PartialCredentialsError) as e:
             logger.error(f"Failed to save allocation results to S3: {e}")
     except Exception as e:
         logger.error(f"Failed to save allocation results for user '{username}': {e}")
 
+def load_asset_manifest():
+    """Hashed asset names written by build_assets.py, or None if the frontend hasn't been built."""
+    try:
+        with open(os.path.join(ASSET_DIST_DIR, 'manifest.json'), 'r') as f:
+            return set(json.load(f).values())
+    except FileNotFoundError:
+        return None
+
+built_assets = load_asset_manifest()
+
 @application.route('/', methods=['GET'])
 def serve_index():
-    return send_from_directory('frontend', 'index.html')
+    if built_assets is None:
+        return send_from_directory('frontend', 'index.html')
+    response = send_from_directory(ASSET_DIST_DIR, 'index.html')
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @application.route('/frontend/<path:filename>', methods=['GET'])
 def serve_static(filename):
-    return send_from_directory('frontend', filename)
+    if built_assets is None or not os.path.isfile(os.path.join(ASSET_DIST_DIR, filename)):
+        return send_from_directory('frontend', filename)
+    response = send_from_directory(ASSET_DIST_DIR, filename)
+    # Hashed names change whenever their content does, so they never need revalidating
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if filename in built_assets else 'no-cache'
+    return response
 
 @application.route('/api/statistics', methods=['GET'])
 def get_statistics():
     """
-    Fetches all allocation results for the current user from the Output directory
-    and returns them as a list of allocation records.
+    Returns all allocation results for the current user as a list of allocation records.
+    Clients sending 'Accept: application/x-ndjson' get the records streamed one per line
+    as each history file is read, so neither side holds the whole history at once.
     """
-    allocations = []
-    try:
-        # Retrieve username from cookies
-        username = request.cookies.get('username')
-        if not username:
-            logger.error("Username not found in cookies.")
-            return jsonify({'error': 'User not authenticated.'}), 401
-
-        logger.debug(f"Retrieved username from cookies: '{username}'")
-
-        # Sanitize the username to prevent directory traversal or injection
-        if not re.match(r'^[a-zA-Z0-9]+$', username):
-            logger.error(f"Invalid username format: '{username}'.")
-            return jsonify({'error': 'Invalid username format.'}), 400
-
-        response = s3.list_objects_v2(Bucket=BUCKET_NAME, Prefix=f"allocations/{username}/")
-        user_files = response.get('Contents', [])
+    # Retrieve username from cookies
+    username = request.cookies.get('username')
+    if not username:
+        logger.error("Username not found in cookies.")
+        return jsonify({'error': 'User not authenticated.'}), 401
 
-        logger.debug(f"Found {len(user_files)} files for user '{username}'.")
+    logger.debug(f"Retrieved username from cookies: '{username}'")
 
-        if not user_files:
-            logger.info(f"No allocations found for user '{username}'.")
-            return jsonify({'allocations': []})
+    # Sanitize the username to prevent directory traversal or injection
+    if not re.match(r'^[a-zA-Z0-9]+$', username):
+        logger.error(f"Invalid username format: '{username}'.")
+        return jsonify({'error': 'Invalid username format.'}), 400
 
-        for file_path in user_files:
-            date_str = file_path['Key'].split('/')[-1].split('.')[0]  # Extract date from filename
-            try:
-                response = s3.get_object(Bucket=BUCKET_NAME, Key=file_path['Key'])
-                content = response['Body'].read().decode('utf-8')
-                if content == "No allocations available.":
-                    continue
-                for line in content.split('\n'):
-                    parts = line.split(' - ')
-                    if len(parts) != 5:
-                        logger.warning(f"Skipping malformed line in file '{file_path['Key']}': {line}")
-                        continue
-                    time, team, capacity,pitch, preferred_str = parts
-                    allocations.append({
-                        'date': date_str,
-                        'time': time.strip(),
-                        'team': team.strip(),
-                        'pitch': pitch.strip(),
-                        'preferred': preferred_str.lower() == 'true'
-                    })
-            except Exception as e:
-                logger.info(f"Error getting file from s3: {e}")
+    if request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE:
+        return Response(stream_with_context(stream_statistics(username)), mimetype=NDJSON_MIMETYPE)
 
+    try:
+        allocations = list(iter_statistics_rows(username))
         logger.info(f"Fetched statistics data successfully for user '{username}'. Total allocations: {len(allocations)}.")
     except Exception as e:
         logger.error(f"Failed to fetch statistics data: {e}")
@@ -283,6 +770,54 @@ def get_statistics():
 
     return jsonify({'allocations': allocations})
 
+def stream_statistics(username):
+    """Yield allocation records as NDJSON lines; a failure part-way through is sent as an error line."""
+    count = 0
+    try:
+        for row in iter_statistics_rows(username):
+            count += 1
+            yield json.dumps(row, separators=(',', ':')) + '\n'
+        logger.info(f"Streamed statistics data for user '{username}'. Total allocations: {count}.")
+    except Exception as e:
+        logger.error(f"Failed to stream statistics data: {e}")
+        yield json.dumps({'error': 'Failed to fetch statistics data.'}) + '\n'
+
+def iter_allocation_keys(s3, username):
+    """Yield the keys of a user's stored allocations, one listing page at a time."""
+    params = {'Bucket': BUCKET_NAME, 'Prefix': f"allocations/{username}/"}
+    while True:
+        with STORAGE_LATENCY.time(operation='list_objects_v2'):
+            response = s3.list_objects_v2(**params)
+        for item in response.get('Contents', []):
+            yield item['Key']
+        if not response.get('IsTruncated'):
+            return
+        params['ContinuationToken'] = response['NextContinuationToken']
+
+def iter_statistics_rows(username):
+    """Fetch and parse a user's allocation files one at a time, yielding a record per allocation."""
+    s3 = get_s3_client()
+    files = 0
+    for key in iter_allocation_keys(s3, username):
+        files += 1
+        date_str = key.split('/')[-1].split('.')[0]  # Extract date from filename
+        try:
+            with STORAGE_LATENCY.time(operation='get_object'):
+                response = s3.get_object(Bucket=BUCKET_NAME, Key=key)
+                content = decode_body(response)
+        except Exception as e:
+            logger.info(f"Error getting file from s3: {e}")
+            continue
+        for record in parse_allocation_text(content, key):
+            yield {
+                'date': date_str,
+                'time': record['time'],
+                'team': record['team'],
+                'pitch': record['pitch'],
+                'preferred': record['preferred']
+            }
+    logger.debug(f"Read {files} allocation files for user '{username}'.")
+
 @application.route('/api/config/<config_type>', methods=['GET', 'POST', 'PUT', 'DELETE'])
 def config_handler(config_type):
     nonPluralConfigType = config_type[:-2] if config_type == "pitches" else config_type[:-1]
@@ -301,24 +836,34 @@ def config_handler(config_type):
     logger.info(f"User config key: {user_key}")
     logger.info(f"Default config key: {default_key}")
 
+    # Fetch everything a change may need up front; player changes also validate against teams
+    loader = ConfigRequestLoader(username)
+    if request.method in ['POST', 'PUT'] and config_type == 'players':
+        loader.prefetch(config_type, 'teams')
+    elif request.method != 'GET':
+        loader.prefetch(config_type)
+
     if request.method == 'GET':
         try:
+            not_modified = not_modified_response(loader, config_type)
+            if not_modified:
+                return not_modified
             if config_type == 'players':
-                config_data = load_players(username=username)
+                config_data = load_players(username=username, loader=loader)
             elif config_type == 'pitches':
-                config_data = load_pitches(username=username)
+                config_data = load_pitches(username=username, loader=loader)
             elif config_type == 'teams':
-                config_data = load_teams(username=username)
+                config_data = load_teams(username=username, loader=loader)
             
             serialized_data = []
             for item in config_data:
                 if config_type == 'pitches':
                     serialized_data.append(item.to_dict())
                 elif config_type == 'teams':
-                    serialized_data.append(item.__dict__)
+                    serialized_data.append(item.to_dict())
                 elif config_type == 'players':
                     serialized_data.append(item.to_dict())
-            return jsonify({config_type: serialized_data}), 200
+            return with_config_etag(jsonify({config_type: serialized_data}), loader, config_type), 200
         except FileNotFoundError:
             return jsonify({'error': f'Default {config_type} config not found.'}), 404
         except Exception as e:
@@ -333,25 +878,16 @@ def config_handler(config_type):
                 logger.error("No data provided.")
                 return jsonify({'error': 'No data provided.'}), 400
 
-            # Load existing data
+            # Load existing data (the loader falls back to the default config if the user has none)
             try:
                 if config_type == 'players':
-                    config_data = load_players(username=username)
+                    config_data = load_players(username=username, loader=loader)
                 elif config_type == 'pitches':
-                    config_data = load_pitches(username=username)
+                    config_data = load_pitches(username=username, loader=loader)
                 elif config_type == 'teams':
-                    config_data = load_teams(username=username)
+                    config_data = load_teams(username=username, loader=loader)
             except FileNotFoundError:
-                # Load default config if user config doesn't exist
-                try:
-                    if config_type == 'players':
-                        config_data = load_players()
-                    elif config_type == 'pitches':
-                        config_data = load_pitches()
-                    elif config_type == 'teams':
-                        config_data = load_teams()
-                except FileNotFoundError:
-                    config_data = []
+                config_data = []
 
             # Convert to a mutable type (list of dicts or Player objects)
             if config_type == 'players':
@@ -359,7 +895,7 @@ def config_handler(config_type):
             elif config_type == 'pitches':
                 config_list = [item.to_dict() for item in config_data]
             elif config_type == 'teams':
-                config_list = [item.__dict__ for item in config_data]
+                config_list = [item.to_dict() for item in config_data]
 
             # Define maximum items and unique fields based on config_type
             if config_type == 'pitches':
@@ -397,7 +933,7 @@ def config_handler(config_type):
 
                     # Validate if team_id exists
                     try:
-                        teams = load_teams(username=username)
+                        teams = load_teams(username=username, loader=loader)
                         if not any(team.id == new_item['team_id'] for team in teams):
                             logger.warning(f"Team ID {new_item['team_id']} does not exist.")
                             return jsonify({'error': 'Invalid team_id provided.'}), 400
@@ -445,7 +981,7 @@ def config_handler(config_type):
                                     return jsonify({'error': 'Shirt number already exists in the team.'}), 400
                             
                             # Validate if the new team_id exists
-                            teams = load_teams(username=username)
+                            teams = load_teams(username=username, loader=loader)
                             if not any(team.id == updated_item['team_id'] for team in teams):
                                 logger.warning(f"Team ID {updated_item['team_id']} does not exist.")
                                 return jsonify({'error': 'Invalid team_id provided.'}), 400
@@ -489,6 +1025,13 @@ def config_handler(config_type):
                 serializable_config = [Team(**item).to_dict() for item in config_list]
 
             save_json_to_s3(user_key, {config_type: serializable_config})
+            if config_type in ['pitches', 'teams']:
+                allocation_cache.invalidate(username)
+                config_object_cache.invalidate(username)
+                preview_config_cache.invalidate(username)
+                preview_cache.invalidate(username)
+            else:
+                player_index_cache.invalidate(username)
             response_msg = f'{config_type.capitalize()} saved successfully.'
             response_data = {'message': response_msg}
 
@@ -0,0 +1,95 @@
+"""
+In-memory stand-in for the subset of the S3 client API the application uses.
+
+Optionally simulates network cost with a fixed per-request latency plus a
+transfer time proportional to the bytes sent or received.
+"""
+import hashlib
+import io
+import threading
+import time
+from collections import Counter
+
+
+class FakeS3Error(Exception):
+    pass
+
+
+class FakeS3Client:
+    def __init__(self, latency_ms=0, bandwidth_mbps=None):
+        self.latency = latency_ms / 1000
+        self.bytes_per_second = bandwidth_mbps * 125000 if bandwidth_mbps else None
+        self.objects = {}
+        self.lock = threading.Lock()
+        self.calls = Counter()
+        self.bytes_transferred = 0
+
+    def _simulate_network(self, operation, size=0):
+        with self.lock:
+            self.calls[operation] += 1
+            self.bytes_transferred += size
+        delay = self.latency
+        if self.bytes_per_second:
+            delay += size / self.bytes_per_second
+        if delay:
+            time.sleep(delay)
+
+    def _not_found(self, operation):
+        from botocore.exceptions import ClientError
+        return ClientError({'Error': {'Code': 'NoSuchKey', 'Message': 'Not Found'}}, operation)
+
+    def put_object(self, Bucket, Key, Body, ContentType=None, ContentEncoding=None, **kwargs):
+        if isinstance(Body, str):
+            Body = Body.encode('utf-8')
+        self._simulate_network('put_object', len(Body))
+        with self.lock:
+            self.objects[Key] = {
+                'Body': Body,
+                'ContentType': ContentType,
+                'ContentEncoding': ContentEncoding,
+                'ETag': f'"{hashlib.md5(Body).hexdigest()}"'
+            }
+        return {'ETag': self.objects[Key]['ETag']}
+
+    def get_object(self, Bucket, Key, **kwargs):
+        stored = self.objects.get(Key)
+        if stored is None:
+            self._simulate_network('get_object')
+            raise self._not_found('GetObject')
+        self._simulate_network('get_object', len(stored['Body']))
+        response = {
+            'Body': io.BytesIO(stored['Body']),
+            'ContentLength': len(stored['Body']),
+            'ContentType': stored['ContentType'],
+            'ETag': stored['ETag']
+        }
+        if stored['ContentEncoding']:
+            response['ContentEncoding'] = stored['ContentEncoding']
+        return response
+
+    def head_object(self, Bucket, Key, **kwargs):
+        self._simulate_network('head_object')
+        stored = self.objects.get(Key)
+        if stored is None:
+            raise self._not_found('HeadObject')
+        return {'ContentLength': len(stored['Body']), 'ETag': stored['ETag']}
+
+    def list_objects_v2(self, Bucket, Prefix='', ContinuationToken=None, MaxKeys=1000, **kwargs):
+        self._simulate_network('list_objects_v2')
+        keys = sorted(key for key in self.objects if key.startswith(Prefix))
+        start = int(ContinuationToken) if ContinuationToken else 0
+        page = keys[start:start + MaxKeys]
+        response = {'KeyCount': len(page)}
+        if page:
+            response['Contents'] = [{'Key': key, 'Size': len(self.objects[key]['Body'])} for key in page]
+        if start + MaxKeys < len(keys):
+            response['IsTruncated'] = True
+            response['NextContinuationToken'] = str(start + MaxKeys)
+        else:
+            response['IsTruncated'] = False
+        return response
+
+    def reset_stats(self):
+        with self.lock:
+            self.calls.clear()
+            self.bytes_transferred = 0
@@ -0,0 +1,192 @@
+"""
+Load-test the Flask API against a local in-memory object store.
+
+The application is started on a local port with its S3 client replaced by
+benchmarks.fake_s3.FakeS3Client, seeded with synthetic users, pitches, teams,
+players and allocation history. Each scenario is then driven by a pool of
+concurrent clients and reported with latency percentiles, a latency
+histogram, error rate, throughput and storage calls per request.
+
+Usage:
+    python benchmarks/load_test.py [--scenarios allocate,statistics,config]
+        [--concurrency 8] [--requests 200] [--users 20] [--weeks 26] [--latency-ms 10]
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_s3 import FakeS3Client
+from benchmarks.synthetic import (generate_allocation_text, generate_history_dates, generate_pitches,
+                                  generate_players, generate_teams, make_rng)
+from allocator.storage import set_s3_client
+
+HISTOGRAM_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, float('inf')]
+
+
+def seed_store(client, users, weeks, rng):
+    """Write configs and allocation history for each synthetic user; returns per-user request data."""
+    from allocator.config_loader import save_json_to_s3
+    from allocator.storage import put_text
+
+    # Default configs that users without their own fall back to
+    save_json_to_s3("configs/pitches.json", {'pitches': generate_pitches(10, rng)})
+    teams = generate_teams(20, rng)
+    save_json_to_s3("configs/teams.json", {'teams': teams})
+    save_json_to_s3("configs/players.json", {'players': generate_players(100, teams, rng)})
+
+    fixtures = {}
+    for index in range(users):
+        username = f"user{index}"
+        pitches = generate_pitches(rng.randint(8, 20), rng)
+        teams = generate_teams(rng.randint(15, 40), rng)
+        save_json_to_s3(f"configs/{username}/pitches.json", {'pitches': pitches})
+        save_json_to_s3(f"configs/{username}/teams.json", {'teams': teams})
+        save_json_to_s3(f"configs/{username}/players.json", {'players': generate_players(len(teams) * 12, teams, rng)})
+        for day in generate_history_dates(weeks):
+            put_text(f"allocations/{username}/{day}.txt", generate_allocation_text(pitches, teams, rng))
+        fixtures[username] = {'pitches': pitches, 'teams': teams}
+    return fixtures
+
+
+def build_request(scenario, username, fixture, rng):
+    """Return (method, path, body) for one request of the scenario."""
+    if scenario == 'allocate':
+        teams = rng.sample(fixture['teams'], k=min(len(fixture['teams']), rng.randint(8, 20)))
+        body = {
+            'date': '2024-09-01',
+            'start_time': '09:00',
+            'end_time': '14:00',
+            'pitches': [str(pitch['id']) for pitch in fixture['pitches']],
+            'teams': [{'id': str(team['id']), 'preferred_time': rng.choice(['', '', '10:00', '11:30'])} for team in teams],
+            'seed': rng.randrange(1 << 30)  # Vary inputs so the result cache doesn't hide solver cost
+        }
+        return 'POST', '/api/allocate', body
+    if scenario == 'statistics':
+        return 'GET', '/api/statistics', None
+    if scenario == 'config':
+        return 'GET', f"/api/config/{rng.choice(['pitches', 'teams', 'players'])}", None
+    raise ValueError(f"Unknown scenario '{scenario}'.")
+
+
+def send(base_url, method, path, body, username):
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method=method)
+    req.add_header('Cookie', f"username={username}")
+    if data is not None:
+        req.add_header('Content-Type', 'application/json')
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req) as response:
+            response.read()
+            ok = response.status < 400
+    except urllib.error.HTTPError as e:
+        e.read()
+        ok = False
+    return (time.perf_counter() - start) * 1000, ok
+
+
+def run_scenario(scenario, base_url, fixtures, client, concurrency, total_requests, rng):
+    usernames = sorted(fixtures)
+    rng_lock = threading.Lock()
+
+    def one_request(_):
+        with rng_lock:
+            username = rng.choice(usernames)
+            method, path, body = build_request(scenario, username, fixtures[username], rng)
+        return send(base_url, method, path, body, username)
+
+    client.reset_stats()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one_request, range(total_requests)))
+    elapsed = time.perf_counter() - start
+    return results, elapsed, dict(client.calls)
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def report(scenario, results, elapsed, calls):
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, ok in results if not ok)
+    count = len(results)
+    print(f"\n== {scenario} ==")
+    print(f"requests {count}  errors {errors} ({100 * errors / count:.1f}%)  throughput {count / elapsed:.1f} req/s")
+    print(f"latency ms  p50 {percentile(latencies, 0.5):.1f}  p90 {percentile(latencies, 0.9):.1f}  "
+          f"p99 {percentile(latencies, 0.99):.1f}  max {latencies[-1]:.1f}  mean {statistics.mean(latencies):.1f}")
+
+    counts = [0] * len(HISTOGRAM_BUCKETS_MS)
+    for latency in latencies:
+        counts[next(i for i, bound in enumerate(HISTOGRAM_BUCKETS_MS) if latency <= bound)] += 1
+    widest = max(counts) or 1
+    lower = 0
+    for bound, bucket_count in zip(HISTOGRAM_BUCKETS_MS, counts):
+        label = f"{lower:>5}-{bound:<5}" if bound != float('inf') else f"{lower:>5}+     "
+        print(f"  {label} ms {bucket_count:>6} {'#' * int(40 * bucket_count / widest)}")
+        lower = bound
+
+    per_request = ', '.join(f"{operation} {total / count:.2f}" for operation, total in sorted(calls.items()))
+    print(f"storage calls per request: {per_request or 'none'}")
+
+
+def start_server(app):
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the API against a local object store.")
+    parser.add_argument('--scenarios', default='allocate,statistics,config', help="Comma-separated scenarios to run.")
+    parser.add_argument('--concurrency', type=int, default=8, help="Concurrent clients.")
+    parser.add_argument('--requests', type=int, default=200, help="Requests per scenario.")
+    parser.add_argument('--users', type=int, default=20, help="Synthetic users to seed.")
+    parser.add_argument('--weeks', type=int, default=26, help="Weeks of allocation history per user.")
+    parser.add_argument('--latency-ms', type=float, default=10, help="Simulated object store latency per call.")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = make_rng(args.seed)
+    client = FakeS3Client()
+    set_s3_client(client)
+    fixtures = seed_store(client, args.users, args.weeks, rng)
+    client.latency = args.latency_ms / 1000
+
+    from application import application
+    # Request logging would dominate the measurement
+    for name in list(logging.root.manager.loggerDict):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    server = start_server(application)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    print(f"Seeded {args.users} users with {args.weeks} weeks of history; "
+          f"store latency {args.latency_ms}ms; {args.concurrency} concurrent clients.")
+    try:
+        for scenario in args.scenarios.split(','):
+            results, elapsed, calls = run_scenario(scenario.strip(), base_url, fixtures, client,
+                                                   args.concurrency, args.requests, rng)
+            report(scenario.strip(), results, elapsed, calls)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Measure cold-start import time of the web application and the allocator modules.
+
+Each target is imported in a fresh interpreter so nothing is cached between runs.
+
+Usage:
+    python benchmarks/startup_time.py [--runs 10]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = ['application', 'allocator.config_loader', 'allocator.allocator_base', 'allocator.main']
+
+# Modules that should only be imported once storage is actually used
+DEFERRED_MODULES = ['boto3', 'botocore']
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+loaded = [name for name in {deferred!r} if name in sys.modules]
+print(f"{{elapsed}}|{{','.join(loaded)}}")
+"""
+
+def measure(module, runs):
+    """Import the module in `runs` fresh interpreters and return timings and eagerly loaded modules."""
+    timings = []
+    loaded = ''
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-c', PROBE.format(module=module, deferred=DEFERRED_MODULES)],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        )
+        elapsed, _, loaded = result.stdout.strip().splitlines()[-1].partition('|')
+        timings.append(float(elapsed) * 1000)
+    return timings, loaded
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold-start import time.")
+    parser.add_argument('--runs', type=int, default=10, help="Fresh interpreters per target.")
+    args = parser.parse_args()
+
+    print(f"{'module':<28} {'median ms':>10} {'min ms':>10} {'max ms':>10}  eager heavy imports")
+    for module in TARGETS:
+        timings, loaded = measure(module, args.runs)
+        print(f"{module:<28} {statistics.median(timings):>10.1f} {min(timings):>10.1f} {max(timings):>10.1f}  {loaded or '-'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Compare the legacy storage format (pretty-printed JSON and plain-text
+allocation history) with compact, gzip-compressed storage.
+
+Both formats are written to an in-memory object store that simulates
+per-request latency and limited bandwidth, then read back through the
+application's loaders, so the legacy run also checks that old objects
+still load.
+
+Usage:
+    python benchmarks/storage_compression.py [--latency-ms 20] [--bandwidth-mbps 20] [--weeks 52]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_s3 import FakeS3Client
+from benchmarks.synthetic import (generate_allocation_text, generate_history_dates, generate_pitches,
+                                  generate_players, generate_teams, make_rng)
+from allocator.config_loader import load_json_from_s3, save_json_to_s3
+from allocator.storage import S3_BUCKET, decode_body, put_text, set_s3_client
+
+USERNAME = 'benchmark'
+
+
+def build_documents(weeks):
+    rng = make_rng()
+    pitches = generate_pitches(40, rng)
+    teams = generate_teams(100, rng)
+    players = generate_players(500, teams, rng)
+    configs = {
+        f"configs/{USERNAME}/pitches.json": {'pitches': pitches},
+        f"configs/{USERNAME}/teams.json": {'teams': teams},
+        f"configs/{USERNAME}/players.json": {'players': players}
+    }
+    history = {
+        f"allocations/{USERNAME}/{day}.txt": generate_allocation_text(pitches, teams, rng)
+        for day in generate_history_dates(weeks)
+    }
+    return configs, history
+
+
+def write_legacy(client, configs, history):
+    """Write objects exactly as the application did before compression was added."""
+    for key, data in configs.items():
+        client.put_object(Bucket=S3_BUCKET, Key=key, Body=json.dumps(data, indent=4), ContentType='application/json')
+    for key, text in history.items():
+        client.put_object(Bucket=S3_BUCKET, Key=key, Body=text)
+
+
+def write_compressed(configs, history):
+    for key, data in configs.items():
+        save_json_to_s3(key, data)
+    for key, text in history.items():
+        put_text(key, text)
+
+
+def read_everything(client, configs):
+    """Load every config and the full history the way the API endpoints do."""
+    for key in configs:
+        load_json_from_s3(key)
+    listing = client.list_objects_v2(Bucket=S3_BUCKET, Prefix=f"allocations/{USERNAME}/")
+    for entry in listing.get('Contents', []):
+        decode_body(client.get_object(Bucket=S3_BUCKET, Key=entry['Key']))
+
+
+def run(label, latency_ms, bandwidth_mbps, configs, history, compressed):
+    client = FakeS3Client(latency_ms=latency_ms, bandwidth_mbps=bandwidth_mbps)
+    set_s3_client(client)
+    if compressed:
+        write_compressed(configs, history)
+    else:
+        write_legacy(client, configs, history)
+    stored = sum(len(obj['Body']) for obj in client.objects.values())
+
+    client.reset_stats()
+    start = time.perf_counter()
+    read_everything(client, configs)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"{label:<12} {stored:>14,} {client.bytes_transferred:>14,} {sum(client.calls.values()):>8} {elapsed:>12.1f}")
+    return client.bytes_transferred, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark compressed vs legacy storage.")
+    parser.add_argument('--latency-ms', type=float, default=20, help="Simulated per-request latency.")
+    parser.add_argument('--bandwidth-mbps', type=float, default=20, help="Simulated bandwidth in megabits/s.")
+    parser.add_argument('--weeks', type=int, default=52, help="Weeks of allocation history to store.")
+    args = parser.parse_args()
+
+    configs, history = build_documents(args.weeks)
+    print(f"{'format':<12} {'bytes stored':>14} {'bytes read':>14} {'calls':>8} {'read ms':>12}")
+    legacy_bytes, legacy_ms = run('legacy', args.latency_ms, args.bandwidth_mbps, configs, history, compressed=False)
+    new_bytes, new_ms = run('compressed', args.latency_ms, args.bandwidth_mbps, configs, history, compressed=True)
+    print(f"\nBytes read reduced by {100 * (1 - new_bytes / legacy_bytes):.1f}%, "
+          f"read latency reduced by {100 * (1 - new_ms / legacy_ms):.1f}%.")
+
+
+if __name__ == "__main__":
+    main()
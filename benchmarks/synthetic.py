@@ -0,0 +1,85 @@
+"""
+Synthetic pitches, teams, players and allocation history for benchmarks.
+"""
+import random
+from datetime import date, datetime, timedelta
+
+AGE_GROUPS = ['Under7s', 'Under8s', 'Under9s', 'Under10s', 'Under11s', 'Under12s',
+              'Under13s', 'Under14s', 'Under15s', 'Under16s']
+CAPACITIES = [5, 7, 9, 11]
+FIRST_NAMES = ['Alex', 'Sam', 'Jordan', 'Charlie', 'Jamie', 'Riley', 'Morgan', 'Casey', 'Taylor', 'Robin']
+SURNAMES = ['Smith', 'Jones', 'Taylor', 'Brown', 'Wilson', 'Evans', 'Thomas', 'Roberts', 'Walker', 'Wright']
+
+
+def generate_pitches(count, rng):
+    """Pitches spread across capacities; some paid and a few overlapping pairs."""
+    pitches = []
+    for pitch_id in range(1, count + 1):
+        pitches.append({
+            'id': pitch_id,
+            'name': f"Pitch {pitch_id}",
+            'capacity': CAPACITIES[pitch_id % len(CAPACITIES)],
+            'location': rng.choice(['Main Park', 'School Field', 'Rec Ground']),
+            'cost': 0 if pitch_id % 5 else rng.choice([20, 35, 50]),
+            'overlaps_with': []
+        })
+    # Pair up some same-capacity pitches that share space
+    for first, second in zip(pitches[::8], pitches[4::8]):
+        if first['capacity'] == second['capacity']:
+            first['overlaps_with'].append(second['id'])
+            second['overlaps_with'].append(first['id'])
+    return pitches
+
+
+def generate_teams(count, rng):
+    teams = []
+    for team_id in range(1, count + 1):
+        teams.append({
+            'id': team_id,
+            'name': f"Team {team_id}",
+            'age_group': AGE_GROUPS[team_id % len(AGE_GROUPS)],
+            'gender': 'Girls' if rng.random() < 0.25 else 'Boys'
+        })
+    return teams
+
+
+def generate_players(count, teams, rng):
+    players = []
+    shirt_numbers = {}
+    for player_id in range(1, count + 1):
+        team = teams[player_id % len(teams)]
+        shirt_numbers[team['id']] = shirt_numbers.get(team['id'], 0) + 1
+        players.append({
+            'id': player_id,
+            'first_name': rng.choice(FIRST_NAMES),
+            'surname': rng.choice(SURNAMES),
+            'team_id': team['id'],
+            'shirt_number': shirt_numbers[team['id']]
+        })
+    return players
+
+
+def format_age_group(age_group):
+    return f"U{''.join(filter(str.isdigit, age_group))}"
+
+
+def generate_allocation_text(pitches, teams, rng):
+    """One matchday in the stored allocation text format, grouped by capacity."""
+    lines_by_capacity = {}
+    for team in rng.sample(teams, k=min(len(teams), 20)):
+        pitch = rng.choice(pitches)
+        kick_off = datetime(2024, 1, 1, 9) + timedelta(minutes=15 * rng.randrange(0, 20))
+        label = f"{format_age_group(team['age_group'])} {team['name']}"
+        line = f"{kick_off.strftime('%I:%M%p').lower()} - {label} - {pitch['capacity']}aside - {pitch['name']} - {rng.random() < 0.5}"
+        lines_by_capacity.setdefault(pitch['capacity'], []).append(line)
+    groups = ["\n".join(sorted(lines)) for _, lines in sorted(lines_by_capacity.items())]
+    return "\n\n".join(groups)
+
+
+def generate_history_dates(weeks, start=date(2024, 1, 7)):
+    """Weekly matchday dates."""
+    return [start + timedelta(weeks=week) for week in range(weeks)]
+
+
+def make_rng(seed=42):
+    return random.Random(seed)
@@ -0,0 +1,169 @@
+"""
+Build fingerprinted frontend assets into frontend/dist.
+
+Every JavaScript module (and static/styles.css) is written with a content
+hash in its file name, import specifiers and HTML references are rewritten to
+the hashed names, and each page gets <link rel="modulepreload"> tags for its
+whole module graph so the browser fetches the modules in parallel instead of
+discovering them one import at a time. Because a module's hash covers the
+rewritten imports, changing any module changes the name of everything that
+depends on it.
+
+With --bundle, each page's entry module is bundled with esbuild (which must be
+on PATH) instead, so a page loads a single script.
+
+application.py serves frontend/dist (hashed files with immutable cache
+headers) whenever frontend/dist/manifest.json exists.
+
+Usage:
+    python build_assets.py [--bundle] [--clean]
+"""
+import argparse
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import subprocess
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FRONTEND_DIR = os.path.join(BASE_DIR, 'frontend')
+DIST_DIR = os.path.join(FRONTEND_DIR, 'dist')
+STYLESHEET = os.path.join(BASE_DIR, 'static', 'styles.css')
+PAGES = ['index.html', 'config.html', 'players_config.html', 'statistics.html']
+
+HASH_LENGTH = 10
+IMPORT_PATTERN = re.compile(r"""(\bfrom\s*|\bimport\s*\(?\s*)(['"])(\.{1,2}/[^'"]+?\.js)\2""")
+SCRIPT_PATTERN = re.compile(r"""(<script[^>]*\bsrc=)(['"])/frontend/([^'"]+?\.js)\2""")
+STYLESHEET_PATTERN = re.compile(r"""(href=)(['"])/static/styles\.css\2""")
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(path, data):
+    """'components/app.js' -> 'components/app.<hash>.js'"""
+    root, ext = posixpath.splitext(path)
+    return f"{root}.{content_hash(data)}{ext}"
+
+
+def read_module(path):
+    with open(os.path.join(FRONTEND_DIR, path), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def module_imports(path, source):
+    """Paths (relative to frontend/) of the modules imported by source."""
+    directory = posixpath.dirname(path)
+    return [posixpath.normpath(posixpath.join(directory, match.group(3))) for match in IMPORT_PATTERN.finditer(source)]
+
+
+def build_module(path, manifest, in_progress=()):
+    """Write a module (after its dependencies) under its hashed name and return that name."""
+    if path in manifest:
+        return manifest[path]
+    if path in in_progress:
+        raise ValueError(f"Circular import involving '{path}'.")
+    source = read_module(path)
+    directory = posixpath.dirname(path)
+
+    def rewrite(match):
+        dependency = posixpath.normpath(posixpath.join(directory, match.group(3)))
+        built = build_module(dependency, manifest, in_progress + (path,))
+        relative = posixpath.relpath(built, directory or '.')
+        if not relative.startswith('.'):
+            relative = f"./{relative}"
+        return f"{match.group(1)}{match.group(2)}{relative}{match.group(2)}"
+
+    output = IMPORT_PATTERN.sub(rewrite, source).encode('utf-8')
+    manifest[path] = hashed_name(path, output)
+    write_output(manifest[path], output)
+    return manifest[path]
+
+
+def bundle_module(path, manifest):
+    """Bundle an entry module and its imports into one hashed file using esbuild."""
+    if path in manifest:
+        return manifest[path]
+    esbuild = shutil.which('esbuild')
+    if not esbuild:
+        raise SystemExit("--bundle requires esbuild on PATH (npm install -g esbuild).")
+    result = subprocess.run(
+        [esbuild, os.path.join(FRONTEND_DIR, path), '--bundle', '--format=esm', '--minify'],
+        capture_output=True, check=True
+    )
+    manifest[path] = hashed_name(path, result.stdout)
+    write_output(manifest[path], result.stdout)
+    return manifest[path]
+
+
+def module_graph(path, seen=None):
+    """The module and everything it imports, transitively."""
+    seen = seen if seen is not None else []
+    if path not in seen:
+        seen.append(path)
+        for dependency in module_imports(path, read_module(path)):
+            module_graph(dependency, seen)
+    return seen
+
+
+def write_output(relative_path, data):
+    destination = os.path.join(DIST_DIR, relative_path)
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    with open(destination, 'wb') as f:
+        f.write(data)
+
+
+def build_page(page, manifest, stylesheet_name, bundle):
+    with open(os.path.join(FRONTEND_DIR, page), 'r', encoding='utf-8') as f:
+        html = f.read()
+
+    preload = []
+
+    def rewrite_script(match):
+        entry = match.group(3)
+        if bundle:
+            built = bundle_module(entry, manifest)
+        else:
+            built = build_module(entry, manifest)
+            preload.extend(manifest[dependency] for dependency in module_graph(entry)[1:])
+        return f"{match.group(1)}{match.group(2)}/frontend/{built}{match.group(2)}"
+
+    html = SCRIPT_PATTERN.sub(rewrite_script, html)
+    html = STYLESHEET_PATTERN.sub(lambda m: f"{m.group(1)}{m.group(2)}/frontend/{stylesheet_name}{m.group(2)}", html)
+    if preload:
+        tags = ''.join(f'    <link rel="modulepreload" href="/frontend/{name}">\n' for name in dict.fromkeys(preload))
+        html = html.replace('</head>', f"{tags}</head>", 1)
+    write_output(page, html.encode('utf-8'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build fingerprinted frontend assets.")
+    parser.add_argument('--bundle', action='store_true', help="Bundle each page's modules with esbuild.")
+    parser.add_argument('--clean', action='store_true', help="Remove frontend/dist and exit.")
+    args = parser.parse_args()
+
+    if os.path.isdir(DIST_DIR):
+        shutil.rmtree(DIST_DIR)
+    if args.clean:
+        return
+
+    manifest = {}
+    with open(STYLESHEET, 'rb') as f:
+        stylesheet = f.read()
+    stylesheet_name = hashed_name('styles.css', stylesheet)
+    write_output(stylesheet_name, stylesheet)
+    manifest['styles.css'] = stylesheet_name
+
+    for page in PAGES:
+        build_page(page, manifest, stylesheet_name, args.bundle)
+
+    # The manifest is written last: its presence switches application.py to the built assets
+    write_output('manifest.json', json.dumps(manifest, indent=4, sort_keys=True).encode('utf-8'))
+    print(f"Built {len(manifest)} assets and {len(PAGES)} pages into {os.path.relpath(DIST_DIR, BASE_DIR)}.")
+
+
+if __name__ == "__main__":
+    main()
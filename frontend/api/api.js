@@ -64,13 +64,100 @@ export async function submitAllocation(payload) {
     return await response.json();
 }
 
+/**
+ * Queue an allocation job for the current user.
+ * @param {Object} payload - Allocation data.
+ * @returns {Promise<Object>} - Job id and initial status.
+ */
+export async function submitAllocationJob(payload) {
+    const response = await fetch(API_ENDPOINTS.ALLOCATION_JOBS, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(payload),
+        credentials: 'same-origin' // Ensure cookies are sent
+    });
+
+    if (!response.ok) {
+        const errorData = await response.json();
+        throw new Error(errorData.error || 'Failed to submit allocation.');
+    }
+
+    return response.json();
+}
+
+/**
+ * Preview an allocation (counts and projected cost) without saving it.
+ * @param {Object} payload - Allocation data, plus a client_id identifying this form.
+ * @param {AbortSignal} signal - Aborts the request when a newer preview supersedes it.
+ * @returns {Promise<Object>} - Preview summary.
+ */
+export async function previewAllocation(payload, signal) {
+    const response = await fetch(API_ENDPOINTS.ALLOCATION_PREVIEW, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(payload),
+        credentials: 'same-origin', // Ensure cookies are sent
+        signal
+    });
+
+    if (!response.ok) {
+        const errorData = await response.json();
+        throw new Error(errorData.error || 'Failed to preview allocation.');
+    }
+
+    return response.json();
+}
+
+/**
+ * Fetch the status (and result once finished) of an allocation job.
+ * @param {string} jobId - Job id returned by submitAllocationJob.
+ * @returns {Promise<Object>} - Job status data.
+ */
+export async function fetchAllocationJob(jobId) {
+    const response = await fetch(`${API_ENDPOINTS.ALLOCATION_JOBS}/${jobId}`, {
+        method: 'GET',
+        credentials: 'same-origin' // Ensure cookies are sent
+    });
+
+    if (!response.ok) {
+        const errorData = await response.json();
+        throw new Error(errorData.error || 'Failed to fetch allocation job.');
+    }
+
+    return response.json();
+}
+
+/**
+ * Cancel a queued or running allocation job.
+ * @param {string} jobId - Job id returned by submitAllocationJob.
+ * @returns {Promise<Object>} - Job status data.
+ */
+export async function cancelAllocationJob(jobId) {
+    const response = await fetch(`${API_ENDPOINTS.ALLOCATION_JOBS}/${jobId}`, {
+        method: 'DELETE',
+        credentials: 'same-origin' // Ensure cookies are sent
+    });
+
+    if (!response.ok) {
+        const errorData = await response.json();
+        throw new Error(errorData.error || 'Failed to cancel allocation job.');
+    }
+
+    return response.json();
+}
+
 /**
  * Fetch statistics data specific to the current user.
- * @returns {Promise<Array>} - List of allocations.
+ * Records are streamed as newline-delimited JSON and handed to onRows in batches
+ * as they arrive, so large histories can be rendered progressively.
+ * Rows are not retained here; callers fold each batch into whatever they need.
+ * @param {Function} [onRows] - Called with each batch of newly received allocations.
+ * @returns {Promise<void>} - Resolves once the stream has been fully read.
  */
-export async function fetchStatisticsData() {
+export async function fetchStatisticsData(onRows = () => {}) {
     const response = await fetch(API_ENDPOINTS.STATISTICS, {
         method: 'GET',
+        headers: { 'Accept': 'application/x-ndjson' },
         credentials: 'same-origin' // Ensure cookies are sent
     });
 
@@ -79,6 +166,33 @@ export async function fetchStatisticsData() {
         throw new Error(errorData.error || 'Failed to fetch statistics.');
     }
 
-    const data = await response.json();
-    return data.allocations;
-}
\ No newline at end of file
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = '';
+
+    const consumeLines = (lines) => {
+        const batch = [];
+        lines.filter(line => line.trim()).forEach(line => {
+            const record = JSON.parse(line);
+            if (record.error) {
+                throw new Error(record.error);
+            }
+            batch.push(record);
+        });
+        if (batch.length) {
+            onRows(batch);
+        }
+    };
+
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) {
+            break;
+        }
+        buffered += decoder.decode(value, { stream: true });
+        const lines = buffered.split('\n');
+        buffered = lines.pop(); // Keep the incomplete last line for the next chunk
+        consumeLines(lines);
+    }
+    consumeLines([buffered + decoder.decode()]);
+}
@@ -61,4 +61,23 @@ export async function deleteConfigData(configType, method, queryParams = {}) {
         throw new Error('Invalid method for deleteConfigData. Use "delete".');
     }
     return fetchConfigData(configType, method, queryParams);
-}
\ No newline at end of file
+}
+
+/**
+ * Fetch One Page of Players
+ * @param {object} queryParams - Optional team_id, q (name prefix), fields, limit and cursor
+ * @returns {Promise<object>} - { players, next_cursor, total }
+ */
+export async function fetchPlayersPage(queryParams = {}) {
+    const params = new URLSearchParams(queryParams);
+    const response = await fetch(`/api/players?${params.toString()}`, {
+        method: 'GET',
+        credentials: 'same-origin' // Ensure cookies are sent
+    });
+    if (!response.ok) {
+        const errorText = await response.text();
+        throw new Error(`Error ${response.status}: ${errorText}`);
+    }
+
+    return response.json();
+}
@@ -4,5 +4,7 @@ export const API_ENDPOINTS = {
     TEAMS: '/api/teams',
     PITCHES: '/api/pitches',
     ALLOCATE: '/api/allocate',
+    ALLOCATION_JOBS: '/api/allocate/jobs',
+    ALLOCATION_PREVIEW: '/api/allocate/preview',
     STATISTICS: '/api/statistics'
 };
\ No newline at end of file
@@ -1,11 +1,21 @@
 // frontend/components/allocationForm.js
 
-import { fetchTeams, fetchPitches, submitAllocation } from '../api/api.js';
+import { fetchTeams, fetchPitches, submitAllocationJob, fetchAllocationJob, cancelAllocationJob, previewAllocation } from '../api/api.js';
 import { groupTeamsByAgeGroup, generateTimeOptions } from '../utils/helpers.js';
 import { logMessage } from '../utils/logger.js';
 import { getCookie } from '../utils/cookie.js';
 
 let currentUsername = '';
+let currentJobId = null;
+
+const JOB_POLL_INTERVAL_MS = 500;
+
+// Previews run once the form has been still for this long
+const PREVIEW_DEBOUNCE_MS = 250;
+// Identifies this form to the server, so a new preview cancels this form's stale one
+const PREVIEW_CLIENT_ID = Math.random().toString(36).slice(2);
+let previewTimer = null;
+let previewController = null;
 
 /**
  * Initialize Allocation Form
@@ -31,10 +41,12 @@ export async function initializeFormComponents(username) {
         logMessage(error.message, 'error');
     }
 
-    document.getElementById('allocation-form').addEventListener('submit', function(event) {
+    const form = document.getElementById('allocation-form');
+    form.addEventListener('submit', function(event) {
         event.preventDefault();
         handleSubmitAllocation();
     });
+    form.addEventListener('change', schedulePreview);
 }
 
 function populateNextSunday() {
@@ -207,7 +219,11 @@ function validatePayload(payload) {
     return true;
 }
 
-function handleSubmitAllocation() {
+/**
+ * Build the allocation payload from the current state of the form.
+ * @returns {Object} - Allocation data.
+ */
+function buildPayload() {
     const date = document.getElementById('date').value;
     const start_hour = document.getElementById('start-hour').value;
     const start_minute = document.getElementById('start-minute').value;
@@ -231,9 +247,14 @@ function handleSubmitAllocation() {
         'start_time': `${start_hour}:${start_minute}`,
         'end_time': `${end_hour}:${end_minute}`,
         'pitches': pitches,
-        'teams': teams
+        'teams': teams,
+        'warm_start': document.getElementById('warm-start').checked
     };
+    return payload;
+}
 
+function handleSubmitAllocation() {
+    const payload = buildPayload();
     if (!validatePayload(payload)) {
         return;
     }
@@ -246,14 +267,106 @@ function handleSubmitAllocation() {
         return;
     }
 
-    submitAllocation(payload)
+    runAllocationJob(payload)
         .then(data => {
+            if (!data) {
+                return; // Superseded by a newer submission
+            }
             displayResults(data.allocations);
             displayLogs(data.logs);
         })
         .catch(error => logMessage(error.message, 'error'));
 }
 
+/**
+ * Queue an allocation job and poll until it finishes.
+ * A new submission cancels any job still in flight from a previous one.
+ * @param {Object} payload - Allocation data.
+ * @returns {Promise<Object|null>} - Finished job data, or null if superseded.
+ */
+async function runAllocationJob(payload) {
+    if (currentJobId) {
+        cancelAllocationJob(currentJobId).catch(() => {});
+    }
+
+    const { job_id: jobId } = await submitAllocationJob(payload);
+    currentJobId = jobId;
+    logMessage('Allocation queued...', 'info');
+
+    while (currentJobId === jobId) {
+        await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+        const job = await fetchAllocationJob(jobId);
+        if (currentJobId !== jobId) {
+            return null; // Superseded while this poll was in flight
+        }
+        if (job.status === 'completed') {
+            currentJobId = null;
+            return job;
+        }
+        if (job.status === 'failed' || job.status === 'cancelled') {
+            currentJobId = null;
+            throw new Error(`Allocation ${job.status}.`);
+        }
+    }
+    return null;
+}
+
+function schedulePreview() {
+    clearTimeout(previewTimer);
+    previewTimer = setTimeout(runPreview, PREVIEW_DEBOUNCE_MS);
+}
+
+/**
+ * Preview the current selection, aborting any preview still in flight.
+ */
+async function runPreview() {
+    if (previewController) {
+        previewController.abort();
+    }
+    const payload = buildPayload();
+    if (payload.pitches.length < 1 || payload.teams.length < 1 || payload.start_time >= payload.end_time) {
+        previewController = null;
+        displayPreview(null);
+        return;
+    }
+
+    const controller = new AbortController();
+    previewController = controller;
+    try {
+        const preview = await previewAllocation({ ...payload, 'client_id': PREVIEW_CLIENT_ID }, controller.signal);
+        if (previewController === controller) {
+            displayPreview(preview);
+        }
+    } catch (error) {
+        if (error.name !== 'AbortError' && previewController === controller) {
+            displayPreview(null);
+        }
+    }
+}
+
+function displayPreview(preview) {
+    const previewBox = document.getElementById('allocation-preview');
+    if (!preview) {
+        previewBox.innerText = '';
+        return;
+    }
+
+    if (preview.allocated === null) {
+        previewBox.innerText = 'Preview not ready in time; it will update on your next change.';
+        return;
+    }
+
+    const parts = [
+        `${preview.allocated} allocated`,
+        `${preview.unallocated} unallocated`,
+        `projected cost ${preview.projected_cost}`
+    ];
+    preview.feasibility
+        .filter(bound => !bound.feasible)
+        .forEach(bound => parts.push(`${bound.capacity}aside short by ${bound.shortfall}`));
+    previewBox.innerText = `Preview${preview.complete ? '' : ' (partial)'}: ${parts.join(' · ')}`;
+}
+
 function displayResults(allocations) {
     const resultsBox = document.getElementById('allocation-results');
     if (!allocations || allocations.length === 0) {
@@ -271,7 +384,8 @@ function displayResults(allocations) {
             }
             currentCapacity = alloc.capacity;
         }
-        resultText += `${alloc.time} - ${alloc.team} - ${alloc.pitch}\n`;
+        const moved = alloc.shift_minutes ? ` (moved ${alloc.shift_minutes > 0 ? '+' : ''}${alloc.shift_minutes} min)` : '';
+        resultText += `${alloc.time} - ${alloc.team} - ${alloc.pitch}${moved}\n`;
     });
 
     resultsBox.value = resultText.trim();
@@ -304,6 +418,8 @@ export function clearSelections() {
         preferredTimeInput.value = '';
     });
 
+    document.getElementById('warm-start').checked = false;
+
     // Reset date to next Sunday
     populateNextSunday();
 
@@ -311,7 +427,13 @@ export function clearSelections() {
     populateStartTime();
     populateEndTime();
 
-    // Clear results and logs
+    // Clear results, preview and logs
+    clearTimeout(previewTimer);
+    if (previewController) {
+        previewController.abort();
+        previewController = null;
+    }
+    displayPreview(null);
     document.getElementById('allocation-results').value = '';
     document.getElementById('console-logs').innerHTML = '';
 }
\ No newline at end of file
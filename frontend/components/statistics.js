@@ -6,20 +6,67 @@ import { extractAgeGroup } from '../utils/helpers.js';
 
 let allTeamNames = [];
 let currentTeamFilter = 'All';
-let lastFetchedAllocations = [];
+let statistics = createStatistics();
 let currentUsername = '';
 
 export async function initializeStatistics(username) {
     currentUsername = username;
+    statistics = createStatistics();
     try {
-        const allocations = await fetchStatisticsData(); // No parameter needed
-        processStatistics(allocations);
+        // Fold rows into the totals as they stream in and render at most once per frame
+        let renderScheduled = false;
+        await fetchStatisticsData(batch => {
+            addAllocations(statistics, batch);
+            if (!renderScheduled) {
+                renderScheduled = true;
+                requestAnimationFrame(() => {
+                    renderScheduled = false;
+                    renderStatistics();
+                });
+            }
+        });
+        renderStatistics();
         populateTeamSelect();
     } catch (error) {
         logMessage(error.message, 'error');
     }
 }
 
+/**
+ * Running totals behind the statistics tables, so each streamed row is
+ * only counted once rather than re-scanning the whole history per render.
+ */
+function createStatistics() {
+    return {
+        dates: new Set(),
+        startTimes: new Set(),
+        pitchNames: new Set(),
+        byTeamDate: {}, // team -> date -> allocation
+        startTimeFrequency: {}, // team -> time -> count
+        pitchUsageFrequency: {} // team -> pitch -> count
+    };
+}
+
+function addAllocations(stats, allocations) {
+    allocations.forEach(alloc => {
+        stats.dates.add(alloc.date);
+        stats.startTimes.add(alloc.time);
+        stats.pitchNames.add(alloc.pitch);
+
+        if (!stats.byTeamDate[alloc.team]) {
+            stats.byTeamDate[alloc.team] = {};
+            stats.startTimeFrequency[alloc.team] = {};
+            stats.pitchUsageFrequency[alloc.team] = {};
+        }
+        stats.byTeamDate[alloc.team][alloc.date] = alloc;
+
+        const times = stats.startTimeFrequency[alloc.team];
+        times[alloc.time] = (times[alloc.time] || 0) + 1;
+        const pitches = stats.pitchUsageFrequency[alloc.team];
+        pitches[alloc.pitch] = (pitches[alloc.pitch] || 0) + 1;
+    });
+}
+
 function populateTeamSelect() {
     const teamSelect = document.getElementById('team-select');
     teamSelect.innerHTML = '<option value="All" selected>All Teams</option>';
@@ -32,14 +79,18 @@ function populateTeamSelect() {
 
     teamSelect.addEventListener('change', function() {
         currentTeamFilter = this.value;
-        processStatistics(lastFetchedAllocations);
+        renderStatistics();
     });
 }
 
 export function processStatistics(allocations) {
-    lastFetchedAllocations = allocations; 
+    statistics = createStatistics();
+    addAllocations(statistics, allocations);
+    renderStatistics();
+}
 
-    allTeamNames = Array.from(new Set(allocations.map(alloc => alloc.team)))
+function renderStatistics() {
+    allTeamNames = Object.keys(statistics.byTeamDate)
         .sort((a, b) => {
             const ageA = extractAgeGroup(a);
             const ageB = extractAgeGroup(b);
@@ -49,9 +100,6 @@ export function processStatistics(allocations) {
             return ageA - ageB;
         });
 
-    const filteredAllocations = currentTeamFilter === 'All' 
-        ? allocations 
-        : allocations.filter(alloc => alloc.team === currentTeamFilter);
     const timesTable = document.getElementById('times-table');
     const pitchesTable = document.getElementById('pitches-table');
     const startTimeFreqTable = document.getElementById('start-time-frequency-table');
@@ -68,20 +116,12 @@ export function processStatistics(allocations) {
     const startTimeFreqTableBody = startTimeFreqTable.querySelector('tbody');
     const pitchUsageFreqTableBody = pitchUsageFreqTable.querySelector('tbody');
 
-    // Use filteredAllocations instead of allocations
+    // The team filter only narrows the rows; columns cover every team
     const teamNames = currentTeamFilter === 'All' ? allTeamNames : [currentTeamFilter];
-    const dates = Array.from(new Set(allocations.map(alloc => alloc.date))).sort();
-    const startTimes = Array.from(new Set(allocations.map(alloc => alloc.time))).sort();
-    const pitchNames = Array.from(new Set(allocations.map(alloc => alloc.pitch))).sort();
-
-    // Structure allocations by team and date
-    const allocationsByTeamDate = {};
-    filteredAllocations.forEach(alloc => {
-        if (!allocationsByTeamDate[alloc.team]) {
-            allocationsByTeamDate[alloc.team] = {};
-        }
-        allocationsByTeamDate[alloc.team][alloc.date] = alloc;
-    });
+    const dates = Array.from(statistics.dates).sort();
+    const startTimes = Array.from(statistics.startTimes).sort();
+    const pitchNames = Array.from(statistics.pitchNames).sort();
+    const allocationsByTeamDate = statistics.byTeamDate;
 
     // Populate Match Start Times Table
     // Create table headers with dates
@@ -165,21 +205,6 @@ export function processStatistics(allocations) {
         startTimeFreqTableHead.appendChild(th);
     });
 
-    // Structure data for frequency
-    const startTimeFrequency = {};
-    teamNames.forEach(team => {
-        startTimeFrequency[team] = {};
-        startTimes.forEach(time => {
-            startTimeFrequency[team][time] = 0;
-        });
-    });
-
-    allocations.forEach(alloc => {
-        if (startTimeFrequency[alloc.team] && startTimeFrequency[alloc.team][alloc.time] !== undefined) {
-            startTimeFrequency[alloc.team][alloc.time]++;
-        }
-    });
-
     // Populate Start Time Frequency Table
     teamNames.forEach(team => {
         const row = document.createElement('tr');
@@ -190,7 +215,7 @@ export function processStatistics(allocations) {
 
         startTimes.forEach(time => {
             const cell = document.createElement('td');
-            cell.innerText = startTimeFrequency[team][time];
+            cell.innerText = (statistics.startTimeFrequency[team] || {})[time] || 0;
             row.appendChild(cell);
         });
 
@@ -206,21 +231,6 @@ export function processStatistics(allocations) {
         pitchUsageFreqTableHead.appendChild(th);
     });
 
-    // Structure data for frequency
-    const pitchUsageFrequency = {};
-    teamNames.forEach(team => {
-        pitchUsageFrequency[team] = {};
-        pitchNames.forEach(pitch => {
-            pitchUsageFrequency[team][pitch] = 0;
-        });
-    });
-
-    allocations.forEach(alloc => {
-        if (pitchUsageFrequency[alloc.team] && pitchUsageFrequency[alloc.team][alloc.pitch] !== undefined) {
-            pitchUsageFrequency[alloc.team][alloc.pitch]++;
-        }
-    });
-
     // Populate Pitch Usage Frequency Table
     teamNames.forEach(team => {
         const row = document.createElement('tr');
@@ -231,7 +241,7 @@ export function processStatistics(allocations) {
 
         pitchNames.forEach(pitch => {
             const cell = document.createElement('td');
-            cell.innerText = pitchUsageFrequency[team][pitch];
+            cell.innerText = (statistics.pitchUsageFrequency[team] || {})[pitch] || 0;
             row.appendChild(cell);
         });
 
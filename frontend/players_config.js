@@ -1,6 +1,6 @@
 // frontend/players_config.js
 
-import { fetchConfigData, saveConfigData, deleteConfigData } from './api/configApi.js';
+import { fetchConfigData, saveConfigData, deleteConfigData, fetchPlayersPage } from './api/configApi.js';
 import { logMessage } from './utils/logger.js';
 
 // DOM Elements
@@ -8,6 +8,7 @@ const playersList = document.getElementById('players-list');
 const playerForm = document.getElementById('player-details-form');
 const createPlayerButton = document.getElementById('create-player-button');
 const teamsDropdown = document.getElementById('player-team');
+const teamFilter = document.getElementById('players-team-filter');
 const toastContainer = document.getElementById('toast-container');
 let allPlayers = [];
 let allTeams = [];
@@ -35,6 +36,9 @@ document.addEventListener('DOMContentLoaded', async () => {
     // Handle Create Player Button
     createPlayerButton.addEventListener('click', handleCreatePlayer);
 
+    // Only the selected team's players are loaded
+    teamFilter.addEventListener('change', loadPlayers);
+
     // Handle Logout
     document.getElementById('logout-button').addEventListener('click', handleLogout);
 });
@@ -54,25 +58,42 @@ async function loadTeams() {
 }
 
 /**
- * Populate Teams Dropdown with format_label
+ * Populate Teams Dropdown and Team Filter with format_label
  */
 function populateTeamsDropdown() {
     teamsDropdown.innerHTML = '<option value="" disabled selected>Select Team</option>';
+    teamFilter.innerHTML = '';
     allTeams.forEach(team => {
         const option = document.createElement('option');
         option.value = team.id;
         option.textContent = team.display_label || team.display_name || `${team.age_group} ${team.name}`;
         teamsDropdown.appendChild(option);
+        teamFilter.appendChild(option.cloneNode(true));
     });
 }
 
 /**
- * Load Players to Populate the Players List
+ * Load the Selected Team's Players, Following Pagination Cursors
  */
 async function loadPlayers() {
+    if (!teamFilter.value) {
+        allPlayers = [];
+        displayPlayers();
+        return;
+    }
     try {
-        const data = await fetchConfigData('players', 'get', { username: getCookie('username') });
-        allPlayers = data.players;
+        const players = [];
+        let cursor = null;
+        do {
+            const params = { team_id: teamFilter.value, limit: 200 };
+            if (cursor) {
+                params.cursor = cursor;
+            }
+            const data = await fetchPlayersPage(params);
+            players.push(...data.players);
+            cursor = data.next_cursor;
+        } while (cursor);
+        allPlayers = players;
         displayPlayers();
     } catch (error) {
         logMessage(error.message, 'error');
@@ -169,7 +190,8 @@ async function handlePlayerFormSubmit(event) {
             showAlert('Player created successfully.', 'success');
         }
 
-        // Refresh the players list
+        // Show the team the player was saved to
+        teamFilter.value = teamId;
         await loadPlayers();
 
         // Reset the form
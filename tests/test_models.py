@@ -0,0 +1,33 @@
+import copy
+import pickle
+import pytest
+from allocator.models.pitch import Pitch
+from allocator.models.team import Team
+
+
+def make_pitch():
+    return Pitch(1, 'Pitch A', 7, 'North', cost=10, overlaps_with=[2, 3])
+
+
+def make_team():
+    return Team(4, 'Lions', 'Under9s', 'Girls')
+
+
+@pytest.mark.parametrize('make', [make_pitch, make_team])
+@pytest.mark.parametrize('clone', [
+    lambda obj: pickle.loads(pickle.dumps(obj)),
+    copy.copy,
+    copy.deepcopy
+], ids=['pickle', 'copy', 'deepcopy'])
+def test_models_survive_pickling_and_copying(make, clone):
+    original = make()
+    cloned = clone(original)
+    assert type(cloned) is type(original)
+    assert cloned.to_dict() == original.to_dict()
+
+
+@pytest.mark.parametrize('make', [make_pitch, make_team])
+def test_clones_stay_immutable(make):
+    cloned = pickle.loads(pickle.dumps(make()))
+    with pytest.raises(AttributeError):
+        cloned.name = 'Renamed'